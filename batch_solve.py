@@ -0,0 +1,133 @@
+# generates and solves batches of mazes offline across a pool of worker processes
+#
+#   python batch_solve.py --count 100000 --sizes 201 --generators backtracker,kruskal --solvers bfs,astar --output results.jsonl
+#
+# every maze is a job with its own seed (--seed + job number), so a run is reproducible whatever the number of
+# workers. results are written to the output file as they come back, one line per (maze, solver), as json lines
+# or csv depending on the file extension (or --format)
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from grid import Grid
+from pathfinding import Pathfinding, SOLVERS
+from maze_generator import MazeGenerator, GENERATORS
+
+FIELDS = ("job", "seed", "generator", "size", "solver", "path_length", "nodes_expanded", "generate_time", "solve_time")
+
+# grids are reused by each worker process between jobs of the same size instead of being reallocated
+worker_grids = {}
+
+def maze_grid(size):
+    if size not in worker_grids:
+        worker_grids[size] = Grid(size, size)
+    return worker_grids[size]
+
+# maze cells are on even rows and columns, so the end node goes on the last even cell
+def maze_end(size):
+    return (size - 1 - (size - 1) % 2,) * 2
+
+# runs in a worker - generates one maze then solves it with every solver, returns a list of result rows
+def solve_job(job):
+    job_number, seed, generator, size, solvers = job
+    grid = maze_grid(size)
+    start_time = time.perf_counter()
+    MazeGenerator().initiate_maze(grid, generator, seed)
+    generate_time = time.perf_counter() - start_time
+
+    start, end = (0, 0), maze_end(size)
+    grid.grid[start[0]][start[1]] = 1
+    grid.grid[end[0]][end[1]] = 2
+    grid.start_node_pos, grid.end_node_pos = start, end
+    maze = bytes(grid.cells) # each solver starts from the untouched maze
+
+    rows = []
+    pathfinding = Pathfinding()
+    for solver in solvers:
+        grid.cells[:] = maze
+        path = pathfinding.solve(solver, grid, start, end)
+        rows.append({"job": job_number, "seed": seed, "generator": generator, "size": size, "solver": solver,
+                     "path_length": len(path) if path else None, "nodes_expanded": pathfinding.nodes_expanded,
+                     "generate_time": generate_time, "solve_time": pathfinding.search_time})
+    return rows
+
+# jobs are made lazily so huge batches don't have to be built up front, generators and sizes take turns
+def make_jobs(count, sizes, generators, solvers, seed):
+    for job_number in range(count):
+        generator = generators[job_number % len(generators)]
+        size = sizes[(job_number // len(generators)) % len(sizes)]
+        yield job_number, seed + job_number, generator, size, solvers
+
+class JsonLinesWriter:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + "\n")
+
+class CsvWriter:
+    def __init__(self, file):
+        self.writer = csv.DictWriter(file, FIELDS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+WRITERS = {"jsonl": JsonLinesWriter, "csv": CsvWriter}
+
+# streams results to file as the pool finishes them (in completion order, the job column gives the original order),
+# chunksize jobs are handed to a worker at a time to keep the inter-process overhead down. returns rows written
+def run_batch(jobs, file, output_format="jsonl", workers=None, chunksize=16):
+    if output_format not in WRITERS:
+        raise ValueError("unknown output format: " + str(output_format))
+    writer = WRITERS[output_format](file)
+    written = 0
+    with multiprocessing.Pool(workers) as pool:
+        for rows in pool.imap_unordered(solve_job, jobs, chunksize):
+            for row in rows:
+                writer.write(row)
+            written += len(rows)
+    file.flush()
+    return written
+
+def parse_list(text, convert=str):
+    return [convert(value) for value in text.split(",") if value]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and solve batches of mazes across a process pool")
+    parser.add_argument("--count", type=int, default=1000, help="number of mazes to generate")
+    parser.add_argument("--sizes", default="101", help="comma separated maze sizes (square grids, odd sizes fill the grid)")
+    parser.add_argument("--generators", default=",".join(GENERATORS), help="comma separated maze generators")
+    parser.add_argument("--solvers", default=",".join(SOLVERS), help="comma separated solvers run on every maze")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first maze, each maze after it adds one")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (defaults to one per core)")
+    parser.add_argument("--chunksize", type=int, default=16, help="jobs handed to a worker at a time")
+    parser.add_argument("--output", help="file to write results to, stdout if not given")
+    parser.add_argument("--format", choices=tuple(WRITERS), help="output format, guessed from the output extension otherwise")
+    args = parser.parse_args()
+
+    generators, solvers = parse_list(args.generators), parse_list(args.solvers)
+    for generator in generators:
+        if generator not in GENERATORS:
+            parser.error("unknown maze algorithm: " + generator)
+    for solver in solvers:
+        if solver not in SOLVERS:
+            parser.error("unknown algorithm: " + solver)
+    output_format = args.format or ("csv" if args.output and args.output.endswith(".csv") else "jsonl")
+    jobs = make_jobs(args.count, parse_list(args.sizes, int), generators, solvers, args.seed)
+
+    start_time = time.perf_counter()
+    if args.output:
+        with open(args.output, "w", newline="") as file:
+            written = run_batch(jobs, file, output_format, args.workers, args.chunksize)
+    else:
+        written = run_batch(jobs, sys.stdout, output_format, args.workers, args.chunksize)
+    print("{} results from {} mazes in {:.2f}s".format(written, args.count, time.perf_counter() - start_time), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# benchmark suite for the solvers, maze generators, grid operations and renderer
+#
+#   python benchmark.py --sizes 50,200 --densities 0,0.2 --seeds 1,2,3 --output results.json
+#   python benchmark.py --baseline results.json      (compares against an earlier run)
+#
+# results are printed (or written) as json, each entry has the median and 95th percentile time in seconds,
+# the nodes expanded for solvers and the peak memory allocated in bytes while it ran
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from grid import Grid
+from chunked_grid import ChunkedGrid
+from pathfinding import Pathfinding, SOLVERS
+from maze_generator import MazeGenerator, GENERATORS
+
+def percentile(times, fraction):
+    ordered = sorted(times)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def make_grid(size, density, seed):
+    # random walls with the corners kept open for the start and end nodes
+    random.seed(seed)
+    grid = Grid(size, size)
+    grid.randomise_walls(density)
+    grid.grid[0][0] = 1
+    grid.grid[size - 1][size - 1] = 2
+    grid.start_node_pos, grid.end_node_pos = (0, 0), (size - 1, size - 1)
+    return grid
+
+# big, nearly empty map for the open group - a ChunkedGrid OPEN_MAP_SCALE times the size each way with a wall in
+# about one cell in 10000, start and end in opposite corners
+OPEN_MAP_SCALE = 20
+
+def make_open_grid(size, seed):
+    random.seed(seed)
+    size *= OPEN_MAP_SCALE
+    grid = ChunkedGrid(size, size)
+    grid.randomise_walls(0.0001)
+    grid.grid[0][0] = 1
+    grid.grid[size - 1][size - 1] = 2
+    grid.start_node_pos, grid.end_node_pos = (0, 0), (size - 1, size - 1)
+    grid.edited()
+    return grid
+
+# runs setup() then times run(state) once per repeat, plus one extra run under tracemalloc for the peak memory.
+# run can return a dict of extra numbers (e.g. nodes expanded), the ones from the last run are kept
+def measure(setup, run, repeats):
+    times = []
+    extra = {}
+    for _ in range(repeats):
+        state = setup()
+        start_time = time.perf_counter()
+        extra = run(state) or {}
+        times.append(time.perf_counter() - start_time)
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return times, extra, peak_memory
+
+def solver_benchmarks(size, density, seed):
+    for algorithm in SOLVERS:
+        def run(grid, algorithm=algorithm):
+            pathfinding = Pathfinding()
+            path = pathfinding.solve(algorithm, grid, grid.start_node_pos, grid.end_node_pos)
+            return {"nodes_expanded": pathfinding.nodes_expanded, "path_length": len(path) if path else None}
+        yield "solve", algorithm, lambda: make_grid(size, density, seed), run
+
+# open maps are where jump point search should beat astar, long straight runs with nothing to stop a jump
+def open_map_benchmarks(size, density, seed):
+    for algorithm in ("astar", "jps"):
+        def run(grid, algorithm=algorithm):
+            pathfinding = Pathfinding()
+            path = pathfinding.solve(algorithm, grid, grid.start_node_pos, grid.end_node_pos)
+            return {"nodes_expanded": pathfinding.nodes_expanded, "path_length": len(path) if path else None}
+        yield "open", algorithm, lambda: make_open_grid(size, seed), run
+
+def generator_benchmarks(size, density, seed):
+    for algorithm in GENERATORS:
+        def run(grid, algorithm=algorithm):
+            MazeGenerator().initiate_maze(grid, algorithm, seed)
+        yield "generate", algorithm, lambda: Grid(size, size), run
+
+def grid_benchmarks(size, density, seed):
+    def explored_grid():
+        grid = make_grid(size, density, seed)
+        grid.cells[:] = grid.cells.translate(bytes.maketrans(b'\x00', b'\x03')) # every empty cell explored
+        return grid
+    yield "grid", "randomise_walls", lambda: Grid(size, size), lambda grid: grid.randomise_walls(density)
+    yield "grid", "reset_explored_nodes", explored_grid, lambda grid: grid.reset_explored_nodes()
+
+def render_benchmarks(size, density, seed):
+    # a full frame of Interface.draw_grid on the dummy video driver, skipped if pygame isn't installed
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # keeps stdout as plain json
+    try:
+        from main import Interface
+    except ImportError:
+        return
+    from settings import MAX_GRID_WIDTH, MAX_GRID_HEIGHT
+
+    def setup():
+        interface = Interface(make_grid(size, density, seed), MAX_GRID_WIDTH, MAX_GRID_HEIGHT)
+        interface.renderer.drawn = None # forces the whole viewport to be drawn
+        return interface
+    def run(interface):
+        interface.draw_grid()
+    yield "render", "draw_grid", setup, run
+
+BENCHMARKS = {"solve": solver_benchmarks, "open": open_map_benchmarks, "generate": generator_benchmarks, "grid": grid_benchmarks, "render": render_benchmarks}
+
+def run_benchmarks(sizes, densities, seeds, repeats, groups):
+    results = []
+    for group in groups:
+        for size in sizes:
+            # maze generation and open maps don't use the wall density
+            for density in (densities if group not in ("generate", "open") else [None]):
+                measured = {} # (benchmark, name) -> timings from every seed
+                for seed in seeds:
+                    for benchmark, name, setup, run in BENCHMARKS[group](size, density or 0, seed):
+                        times, extra, peak_memory = measure(setup, run, repeats)
+                        entry = measured.setdefault((benchmark, name), {"times": [], "extras": [], "peak_memory": 0})
+                        entry["times"] += times
+                        entry["extras"].append(extra)
+                        entry["peak_memory"] = max(entry["peak_memory"], peak_memory)
+                for (benchmark, name), entry in measured.items():
+                    times = entry["times"]
+                    result = {"benchmark": benchmark, "name": name, "size": size, "density": density,
+                              "runs": len(times), "median": statistics.median(times), "p95": percentile(times, 0.95),
+                              "peak_memory": entry["peak_memory"]}
+                    for key in ("nodes_expanded", "path_length"):
+                        values = [extra[key] for extra in entry["extras"] if extra.get(key) is not None]
+                        if values:
+                            result[key] = statistics.median(values)
+                    results.append(result)
+                    print("{benchmark} {name} size={size} density={density}: median {median:.4f}s p95 {p95:.4f}s".format(**result), file=sys.stderr)
+    return results
+
+# matches results to a baseline run and flags anything whose median got slower by more than threshold (1.2 = 20%)
+def compare(results, baseline, threshold):
+    def key(result):
+        return (result["benchmark"], result["name"], result["size"], result["density"])
+    baseline_medians = {key(result): result["median"] for result in baseline}
+    comparison = []
+    for result in results:
+        if key(result) in baseline_medians and baseline_medians[key(result)] > 0:
+            ratio = result["median"] / baseline_medians[key(result)]
+            comparison.append({"benchmark": result["benchmark"], "name": result["name"], "size": result["size"],
+                               "density": result["density"], "baseline_median": baseline_medians[key(result)],
+                               "median": result["median"], "ratio": ratio, "regression": ratio > threshold})
+    return comparison
+
+def parse_list(text, convert):
+    return [convert(value) for value in text.split(",") if value]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the maze solvers, generators, grid operations and renderer")
+    parser.add_argument("--sizes", default="50,100,200", help="comma separated grid sizes (square grids)")
+    parser.add_argument("--densities", default="0,0.1,0.3", help="comma separated wall densities")
+    parser.add_argument("--seeds", default="1,2,3", help="comma separated random seeds")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per seed")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma separated groups: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--output", help="write the json results here instead of printing them")
+    parser.add_argument("--baseline", help="json results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="median slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    groups = parse_list(args.only, str)
+    for group in groups:
+        if group not in BENCHMARKS:
+            parser.error("unknown benchmark group: " + group)
+    results = run_benchmarks(parse_list(args.sizes, int), parse_list(args.densities, float),
+                             parse_list(args.seeds, int), args.repeats, groups)
+    report = {"results": results}
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        report["comparison"] = compare(results, baseline["results"], args.threshold)
+        regressions = [entry for entry in report["comparison"] if entry["regression"]]
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    # a non-zero exit code lets scripts catch regressions
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
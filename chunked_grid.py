@@ -0,0 +1,291 @@
+import random
+from settings import WEIGHTED_NODE_COSTS
+from grid import Grid, CLEAR_EXPLORED, as_bytes, wall_runs
+
+CHUNK_SIZE = 64 # chunks are CHUNK_SIZE x CHUNK_SIZE cells
+
+# stands in for a per-cell array in the searches on a chunked grid, only cells that have been written take up memory
+class SparseArray(dict):
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, index):
+        return self.default
+
+# the cells of a ChunkedGrid, indexed the same way as Grid.cells (row * columns + column, a byte a cell, walls are
+# 255). the grid is split into square chunks and a chunk only gets a bytearray the first time a non-empty cell is
+# written to it, every cell of a chunk that doesn't exist reads as empty (0)
+class ChunkedCells:
+    def __init__(self, rows, columns, chunk_size=CHUNK_SIZE):
+        self.rows = rows
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.chunk_columns = -(-columns // chunk_size)
+        self.chunks = {} # chunk number (chunk row * chunk_columns + chunk column) -> bytearray of its cells, row by row
+
+    def __len__(self):
+        return self.rows * self.columns
+
+    # chunk number and position inside the chunk of a cell
+    def locate(self, index):
+        row, column = divmod(index, self.columns)
+        chunk_row, row_in_chunk = divmod(row, self.chunk_size)
+        chunk_column, column_in_chunk = divmod(column, self.chunk_size)
+        return chunk_row * self.chunk_columns + chunk_column, row_in_chunk * self.chunk_size + column_in_chunk
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.get_slice(index)
+        chunk, position = self.locate(index)
+        chunk = self.chunks.get(chunk)
+        return 0 if chunk is None else chunk[position]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.set_slice(index, value)
+            return
+        chunk, position = self.locate(index)
+        if chunk not in self.chunks:
+            if value == 0:
+                return # already empty, no need to make the chunk
+            self.chunks[chunk] = bytearray(self.chunk_size * self.chunk_size)
+        self.chunks[chunk][position] = value
+
+    # slices inside a row (what the renderer asks for) are copied a chunk at a time, with chunks that don't
+    # exist filled in as empty. anything else is read a cell at a time
+    def get_slice(self, index):
+        start, stop, step = index.indices(len(self))
+        if stop <= start:
+            return b""
+        row, first_column = divmod(start, self.columns)
+        if (stop - 1) // self.columns != row:
+            return bytes(self[cell] for cell in range(start, stop, step))
+        chunk_row, row_in_chunk = divmod(row, self.chunk_size)
+        stop_column = stop - row * self.columns
+        cells = bytearray()
+        column = first_column
+        while column < stop_column:
+            chunk_column, column_in_chunk = divmod(column, self.chunk_size)
+            chunk_stop = min(stop_column, (chunk_column + 1) * self.chunk_size)
+            count = len(range(column, chunk_stop, step))
+            chunk = self.chunks.get(chunk_row * self.chunk_columns + chunk_column)
+            if chunk is None:
+                cells += bytes(count)
+            else:
+                offset = row_in_chunk * self.chunk_size - chunk_column * self.chunk_size
+                cells += chunk[offset + column:offset + chunk_stop:step]
+            column += count * step
+        return bytes(cells)
+
+    def set_slice(self, index, value):
+        start, stop, step = index.indices(len(self))
+        if (start, stop, step) == (0, len(self), 1):
+            self.load(value)
+            return
+        for cell, cell_value in zip(range(start, stop, step), value):
+            self[cell] = cell_value
+
+    # replaces every cell from a dense buffer laid out like Grid.cells, only chunks with something in them are kept
+    def load(self, cells):
+        if len(cells) != len(self):
+            raise ValueError("cells don't match the size of the grid")
+        cells = as_bytes(cells)
+        self.chunks = {}
+        size = self.chunk_size
+        for row in range(self.rows):
+            chunk_row, row_in_chunk = divmod(row, size)
+            for column in range(0, self.columns, size):
+                part = cells[row * self.columns + column:row * self.columns + min(column + size, self.columns)]
+                if part.count(0) != len(part):
+                    chunk = chunk_row * self.chunk_columns + column // size
+                    if chunk not in self.chunks:
+                        self.chunks[chunk] = bytearray(size * size)
+                    self.chunks[chunk][row_in_chunk * size:row_in_chunk * size + len(part)] = part
+
+    # dense copy of every cell, for code that needs the whole grid at once (saving, distance fields, components).
+    # this takes a byte per cell, so it is only for grids that would fit in memory anyway
+    def __bytes__(self):
+        cells = bytearray(len(self))
+        size = self.chunk_size
+        for chunk, chunk_cells in self.chunks.items():
+            chunk_row, chunk_column = divmod(chunk, self.chunk_columns)
+            top, left = chunk_row * size, chunk_column * size
+            width = min(size, self.columns - left)
+            for row_in_chunk in range(min(size, self.rows - top)):
+                start = (top + row_in_chunk) * self.columns + left
+                cells[start:start + width] = chunk_cells[row_in_chunk * size:row_in_chunk * size + width]
+        return bytes(cells)
+
+    def __iter__(self):
+        return iter(bytes(self))
+
+    # number of cells of a byte value, empty cells in chunks that don't exist included
+    def count(self, value):
+        total = sum(chunk.count(value) for chunk in self.chunks.values())
+        if value == 0:
+            # chunks on the bottom and right edges hang over the grid, but those cells are always empty, so they
+            # make up for the same number of cells inside the grid that aren't counted here
+            total += len(self) - len(self.chunks) * self.chunk_size * self.chunk_size
+        return total
+
+# a Grid for very large, mostly empty worlds - cells live in ChunkedCells, so memory grows with the number of chunks
+# that have anything in them rather than the area of the grid. the searches in pathfinding.py keep their per-cell
+# state in SparseArrays (see cell_array) so they only use memory for the cells they reach, and the renderer only
+# reads the visible part of each row. things that take a dense copy of the cells (saving, distance fields,
+# components, hierarchical.py) still work, but only on grids that would fit in memory as a Grid
+class ChunkedGrid(Grid):
+    # cells can be a dense buffer laid out like Grid.cells, e.g. when loading a maze file
+    def __init__(self, rows, columns, grid_size=None, cells=None, chunk_size=CHUNK_SIZE):
+        chunked_cells = ChunkedCells(rows, columns, chunk_size)
+        if cells is not None:
+            chunked_cells.load(cells)
+        super().__init__(rows, columns, grid_size, chunked_cells)
+        self.wall_chunk_rows = {} # chunk row -> wall runs of each of its rows, filled in by wall_runs
+        self.wall_chunk_rows_version = None # grid version wall_chunk_rows is for
+
+    # copies the chunks rather than a dense buffer of every cell
+    def copy(self):
+        grid = ChunkedGrid(self.rows, self.columns, self.grid_size, chunk_size=self.cells.chunk_size)
+        grid.cells.chunks = {chunk: bytearray(cells) for chunk, cells in self.cells.chunks.items()}
+        grid.start_node_pos, grid.end_node_pos = self.start_node_pos, self.end_node_pos
+        grid.seed = self.seed
+        grid.version = self.version
+        return grid
+
+    def make_row_views(self):
+        return ChunkedRows(self.cells)
+
+    # goes straight to the cell's chunk from its row and column, rather than through a flat index
+    def is_open(self, row, column):
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            return False
+        size = self.cells.chunk_size
+        chunk = self.cells.chunks.get(row // size * self.cells.chunk_columns + column // size)
+        return chunk is None or chunk[row % size * size + column % size] != 255
+
+    # found a whole row of chunks at a time, reading only the chunks with walls in them rather than a row of cells,
+    # and kept until the grid is edited (explored cells written by a search don't change them)
+    def wall_runs(self, row):
+        if self.wall_chunk_rows_version != self.version:
+            self.wall_chunk_rows = {}
+            self.wall_chunk_rows_version = self.version
+        chunk_row, row_in_chunk = divmod(row, self.cells.chunk_size)
+        rows = self.wall_chunk_rows.get(chunk_row)
+        if rows is None:
+            rows = self.wall_chunk_rows[chunk_row] = self.chunk_row_wall_runs(chunk_row)
+        return rows[row_in_chunk]
+
+    def chunk_row_wall_runs(self, chunk_row):
+        cells = self.cells
+        size = cells.chunk_size
+        rows = [[] for _ in range(size)]
+        first = chunk_row * cells.chunk_columns
+        # whichever is shorter, every chunk number on the row or every chunk there is
+        if len(cells.chunks) > cells.chunk_columns:
+            chunks = range(first, first + cells.chunk_columns)
+        else:
+            chunks = sorted(chunk for chunk in cells.chunks if first <= chunk < first + cells.chunk_columns)
+        for chunk in chunks:
+            chunk_cells = cells.chunks.get(chunk)
+            if chunk_cells is None:
+                continue
+            left = (chunk - first) * size
+            for start, end in wall_runs(chunk_cells):
+                # a run can carry on from the end of one row of the chunk to the start of the next
+                while start < end:
+                    row_in_chunk = start // size
+                    row_end = min(end, (row_in_chunk + 1) * size)
+                    runs = rows[row_in_chunk]
+                    run = (start - row_in_chunk * size + left, row_end - row_in_chunk * size + left)
+                    if runs and runs[-1][1] == run[0]:
+                        runs[-1] = (runs[-1][0], run[1]) # the run carries on from the chunk to the left
+                    else:
+                        runs.append(run)
+                    start = row_end
+        return rows
+
+    # rows read from the chunks with walls in them, rather than every row of cells
+    def wall_rows(self):
+        cells = self.cells
+        size = cells.chunk_size
+        rows = set()
+        for chunk, chunk_cells in cells.chunks.items():
+            top = chunk // cells.chunk_columns * size
+            for start, end in wall_runs(chunk_cells):
+                rows.update(range(top + start // size, top + (end - 1) // size + 1))
+        return sorted(rows)
+
+    def cell_array(self, typecode, value=0):
+        return SparseArray(value)
+
+    def fill(self, cell_type):
+        # filling with anything but empty has to make every chunk
+        if cell_type == 0:
+            self.cells.chunks = {}
+        else:
+            self.cells.load(bytes([cell_type & 0xff]) * len(self.cells))
+        self.edited()
+
+    def count_cells(self, cell_type):
+        return self.cells.count(cell_type & 0xff)
+
+    def reset_explored_nodes(self):
+        # chunks that only had explored cells in them are dropped again
+        chunks = self.cells.chunks
+        for chunk in list(chunks):
+            chunks[chunk] = chunks[chunk].translate(CLEAR_EXPLORED)
+            if chunks[chunk].count(0) == len(chunks[chunk]):
+                del chunks[chunk]
+
+    # picks round(probability_of_wall * cells) cells at random rather than drawing a number for every cell,
+    # so the time taken grows with the number of walls placed, not the area of the grid
+    def randomise_walls(self, probability_of_wall=0.1):
+        cells = self.cells
+        for index in random.sample(range(len(cells)), round(probability_of_wall * len(cells))):
+            if cells[index] not in (1, 2): # start and end nodes never become walls
+                cells[index] = 255 # -1 represents a wall node
+        self.edited()
+
+    def randomise_weights(self, probability_of_weight=0.2):
+        cells = self.cells
+        weight_types = sorted(WEIGHTED_NODE_COSTS)
+        for index in random.sample(range(len(cells)), round(probability_of_weight * len(cells))):
+            if cells[index] == 0: # only empty cells are painted
+                cells[index] = random.choice(weight_types)
+        self.edited()
+
+    def is_weighted(self):
+        return any(chunk.count(cell_type) for chunk in self.cells.chunks.values() for cell_type in WEIGHTED_NODE_COSTS)
+
+# grid.grid for a ChunkedGrid, grid.grid[row][column] reads and writes the cell, with walls read back as -1
+class ChunkedRows:
+    def __init__(self, cells):
+        self.cells = cells
+
+    def __len__(self):
+        return self.cells.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.cells.rows:
+            raise IndexError("row out of range")
+        return ChunkedRow(self.cells, row)
+
+class ChunkedRow:
+    def __init__(self, cells, row):
+        self.cells = cells
+        self.start = row * cells.columns
+
+    def __len__(self):
+        return self.cells.columns
+
+    def __getitem__(self, column):
+        if not 0 <= column < self.cells.columns:
+            raise IndexError("column out of range")
+        value = self.cells[self.start + column]
+        return value - 256 if value > 127 else value
+
+    def __setitem__(self, column, value):
+        if not 0 <= column < self.cells.columns:
+            raise IndexError("column out of range")
+        self.cells[self.start + column] = value & 0xff
@@ -0,0 +1,97 @@
+from array import array
+import re
+
+OPEN_CELLS = bytes(0 if value == 255 else 1 for value in range(256)) # 1 for any cell that isn't a wall
+RUN = re.compile(b"\x01+") # a horizontal run of open cells
+
+# labels the connected regions of open cells so "can end be reached from start?" is answered without a search.
+# each horizontal run of open cells gets an id, runs touching the run above are joined with union-find, and every
+# cell stores the id of its run. opening a cell just joins it to its neighbours, placing a wall can split a region
+# so the labels are rebuilt the next time they're asked for
+class ComponentIndex:
+    def __init__(self):
+        self.snapshot = None # CellSnapshot of the grid's OPEN_CELLS mask, as of the last refresh
+        self.labels = None # run id of every cell, -1 for walls
+        self.parents = array('i') # union-find over the run ids
+        self.rebuilds = 0
+
+    def find(self, label):
+        parents = self.parents
+        # path halving - points each visited id at its grandparent on the way up
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parents[max(first, second)] = min(first, second)
+
+    def rebuild(self, grid, open_cells):
+        self.rebuilds += 1
+        columns = grid.columns
+        labels = array('i', [-1]) * len(open_cells)
+        parents = self.parents = array('i')
+        previous_runs = [] # (start column, end column, id) of the runs in the row above
+        for row_start in range(0, len(open_cells), columns):
+            runs = []
+            above = 0
+            for match in RUN.finditer(open_cells, row_start, row_start + columns):
+                start, end = match.start() - row_start, match.end() - row_start
+                label = len(parents)
+                parents.append(label)
+                labels[row_start + start:row_start + end] = array('i', [label]) * (end - start)
+                # join every run above that overlaps this one, runs in both rows are in column order
+                while above < len(previous_runs) and previous_runs[above][1] <= start:
+                    above += 1
+                while above < len(previous_runs) and previous_runs[above][0] < end:
+                    self.union(previous_runs[above][2], label)
+                    if previous_runs[above][1] > end:
+                        break # that run carries on past this one, it may overlap the next run too
+                    above += 1
+                runs.append((start, end, label))
+            previous_runs = runs
+        self.labels = labels
+
+    # cells that were walls and are now open are joined to their open neighbours
+    def join_opened(self, grid, opened):
+        labels, columns = self.labels, grid.columns
+        for index in opened:
+            labels[index] = len(self.parents)
+            self.parents.append(labels[index])
+            row, column = divmod(index, columns)
+            for neighbour, inside in ((index - columns, row > 0), (index + columns, row < grid.rows - 1),
+                                      (index - 1, column > 0), (index + 1, column < columns - 1)):
+                if inside and labels[neighbour] != -1:
+                    self.union(labels[neighbour], labels[index])
+
+    # brings the labels up to date with the grid. nothing is looked at until grid.version moves on (edits made
+    # straight to grid.cells have to call grid.edited()), then only the cells that opened or closed are dealt with
+    def refresh(self, grid):
+        if self.snapshot is None or self.snapshot.grid is not grid:
+            self.snapshot = grid.snapshot(OPEN_CELLS)
+            self.rebuild(grid, self.snapshot.cells)
+            return
+        changed = self.snapshot.update()
+        opened = [index for index in changed if self.snapshot.cells[index]]
+        if len(opened) != len(changed):
+            self.rebuild(grid, self.snapshot.cells) # a wall was placed
+        else:
+            self.join_opened(grid, opened)
+
+    # true if the labels are up to date with the grid, so asking about it won't look at any of its cells
+    def current(self, grid):
+        return self.snapshot is not None and self.snapshot.grid is grid and self.snapshot.version == grid.version
+
+    # true if a and b are open cells in the same connected region
+    def connected(self, grid, a, b):
+        self.refresh(grid)
+        a, b = self.labels[grid.to_index(a)], self.labels[grid.to_index(b)]
+        return a != -1 and b != -1 and self.find(a) == self.find(b)
+
+    # id of the region node is in, the same for every cell in a region, -1 for walls
+    def component(self, grid, node):
+        self.refresh(grid)
+        label = self.labels[grid.to_index(node)]
+        return -1 if label == -1 else self.find(label)
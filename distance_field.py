@@ -0,0 +1,95 @@
+from array import array
+from collections import OrderedDict, deque
+import heapq
+
+# distance from every cell to one target cell, with the next step towards it, built with a single
+# bfs (or dijkstra when the grid has weights) outwards from the target. once built, the distance from
+# any cell is one lookup and the path from any cell is found by following next steps, O(path length)
+class DistanceField:
+    def __init__(self, grid, target):
+        self.target = grid.to_index(target)
+        self.version = grid.version # grid version the field was built for, it's stale once the grid is edited
+        self.columns = grid.columns
+        self.nodes_expanded = 0
+        # -1 means the cell can't reach the target
+        self.distances = array('i', [-1]) * len(grid.cells)
+        self.next_steps = array('i', [-1]) * len(grid.cells)
+        if grid.is_weighted():
+            self.build_weighted(grid)
+        else:
+            self.build(grid)
+
+    def build(self, grid):
+        distances, next_steps = self.distances, self.next_steps
+        distances[self.target] = 0
+        next_steps[self.target] = self.target
+        queue = deque([self.target])
+        while queue:
+            current = queue.popleft()
+            self.nodes_expanded += 1
+            for neighbour in grid.get_neighbour_indices(current):
+                if distances[neighbour] == -1:
+                    distances[neighbour] = distances[current] + 1
+                    next_steps[neighbour] = current
+                    queue.append(neighbour)
+
+    # walking from a neighbour into current costs current's move cost, so the search outwards from
+    # the target adds the cost of the cell being left rather than the one being entered
+    def build_weighted(self, grid):
+        distances, next_steps, move_costs, cells = self.distances, self.next_steps, grid.move_costs, grid.cells
+        distances[self.target] = 0
+        next_steps[self.target] = self.target
+        queue = [(0, self.target)]
+        while queue:
+            dist, current = heapq.heappop(queue)
+            if dist > distances[current]:
+                continue # stale entry, a shorter distance was already found
+            self.nodes_expanded += 1
+            new_dist = dist + move_costs[cells[current]]
+            for neighbour in grid.get_neighbour_indices(current):
+                if distances[neighbour] == -1 or new_dist < distances[neighbour]:
+                    distances[neighbour] = new_dist
+                    next_steps[neighbour] = current
+                    heapq.heappush(queue, (new_dist, neighbour))
+
+    # cost of the shortest path from node to the target, None if it can't be reached
+    def distance(self, node):
+        dist = self.distances[node[0] * self.columns + node[1]]
+        return None if dist == -1 else dist
+
+    # shortest path from node to the target as a list of (row, column), None if it can't be reached
+    def path_from(self, node):
+        current = node[0] * self.columns + node[1]
+        if self.distances[current] == -1:
+            return None
+        path = [node]
+        while current != self.target:
+            current = self.next_steps[current]
+            path.append(divmod(current, self.columns))
+        return path
+
+# the most recently used distance fields of a grid, keyed by target cell. fields built for an older
+# grid version are rebuilt when they're next asked for, and the least recently used is dropped past max_fields
+class DistanceFieldCache:
+    def __init__(self, max_fields=8):
+        self.max_fields = max_fields
+        self.fields = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, grid, target):
+        field = self.fields.get(target)
+        if field is not None and field.version == grid.version:
+            self.hits += 1
+            self.fields.move_to_end(target)
+            return field
+        self.misses += 1
+        field = DistanceField(grid, target)
+        self.fields[target] = field
+        self.fields.move_to_end(target)
+        if len(self.fields) > self.max_fields:
+            self.fields.popitem(last=False)
+        return field
+
+    def clear(self):
+        self.fields.clear()
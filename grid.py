@@ -0,0 +1,321 @@
+from array import array
+import mmap
+import random
+import re
+import struct
+from settings import WEIGHTED_NODE_COSTS
+from distance_field import DistanceFieldCache
+from components import ComponentIndex
+
+# translation tables for whole-grid operations on the byte backend,
+# cells are stored as single bytes so -1 (wall) is held as 255
+CLEAR_EXPLORED = bytes.maketrans(b'\x03\x04', b'\x00\x00') # explored (3) and frontier (4) -> empty (0)
+NOT_START_OR_END = bytes(0 if value in (1, 2) else 255 for value in range(256)) # 0x00 for start/end, 0xff otherwise
+ONLY_EMPTY = bytes(255 if value == 0 else 0 for value in range(256)) # 0xff for empty cells, 0x00 otherwise
+
+# cost of moving into a cell, indexed by its byte value - walls (255) are 0 as they can't be entered
+MOVE_COSTS = bytes(WEIGHTED_NODE_COSTS.get(value, 0 if value == 255 else 1) for value in range(256))
+
+# maze file format - a fixed header then the cells, either bit-packed walls (1 bit a cell, most significant bit first,
+# 1 for a wall) or one byte per cell when the grid has weights. the header is magic, version, flags, rows, columns,
+# start row/column, end row/column (-1 when not placed) and the maze seed
+MAZE_FILE_MAGIC = b"MAZE"
+MAZE_FILE_VERSION = 1
+MAZE_FILE_HEADER = struct.Struct("<4sBBxxIIiiiiq")
+BYTE_PER_CELL = 1 # flag - cells are stored a byte each rather than bit-packed
+HAS_SEED = 2 # flag - the seed field is set
+WALLS_TO_BITS = bytes(ord("1") if value == 255 else ord("0") for value in range(256)) # cell -> ascii bit
+BITS_TO_WALLS = bytes.maketrans(b"01", b"\x00\xff") # ascii bit -> empty (0) or wall (255)
+SEEDS = range(-2 ** 63, 2 ** 63) # seeds that fit in the header's signed 64-bit seed field
+
+WALL_RUN = re.compile(b"\xff+") # a horizontal run of walls
+
+# seeds are checked when a maze is made with one, so a seed that can't be saved is turned down then rather than
+# when the maze is saved. None (no seed) is always fine
+def check_seed(seed):
+    if seed is not None and (not isinstance(seed, int) or seed not in SEEDS):
+        raise ValueError("maze seeds have to be ints from -2**63 to 2**63 - 1, not " + repr(seed))
+
+# grids loaded with mmap hold their cells in a memoryview, which has no count/translate, so it is copied for those
+def as_bytes(cells):
+    return cells if isinstance(cells, bytearray) else bytes(cells)
+
+# (start, end) of every run of walls in cells, end exclusive. find skips to each wall, so long stretches without
+# any (most of an open grid) cost next to nothing
+def wall_runs(cells):
+    runs = []
+    start = cells.find(255)
+    while start != -1:
+        end = WALL_RUN.match(cells, start).end()
+        runs.append((start, end))
+        start = cells.find(255, end)
+    return runs
+
+# a copy of a grid's cells put through a translation table (e.g. move costs, or open/wall), kept up to date with
+# edits. update() only looks at the cells once grid.version has moved on, so while the grid is unedited it costs
+# a single comparison, and then rows are compared whole so unchanged rows are skipped in one go
+class CellSnapshot:
+    def __init__(self, grid, table):
+        self.grid = grid
+        self.table = table
+        self.version = grid.version
+        self.cells = as_bytes(grid.cells).translate(table)
+
+    # indices of the cells whose translated value changed since the last update, empty if none did
+    def update(self):
+        grid = self.grid
+        if grid.version == self.version:
+            return []
+        self.version = grid.version
+        cells = as_bytes(grid.cells).translate(self.table)
+        columns = grid.columns
+        changed = []
+        for row_start in range(0, len(cells), columns):
+            if cells[row_start:row_start + columns] != self.cells[row_start:row_start + columns]:
+                changed += [index for index in range(row_start, row_start + columns) if cells[index] != self.cells[index]]
+        self.cells = cells
+        return changed
+
+class Grid:
+    move_costs = MOVE_COSTS
+
+    # cells can be passed in to wrap an existing writable buffer (e.g. a memory-mapped maze file) without copying it
+    def __init__(self, rows, columns, grid_size=None, cells=None):
+        self.rows = rows
+        self.columns = columns
+        self.grid_size = grid_size
+        self.cells = bytearray(rows * columns) if cells is None else cells # one byte per cell, initialised to 0 (empty)
+        self.grid = self.make_row_views() # grid.grid[row][column] reads and writes straight through to self.cells
+        self.start_node_pos = None
+        self.end_node_pos = None
+        self.path = None
+        self.seed = None # seed of the generated maze, if there is one, saved along with it
+        # bumped on every edit that changes which cells can be walked or what they cost (walls, weights, start/end),
+        # cached distance fields are only reused while the version they were built for is current
+        self.version = 0
+        self.distance_fields = DistanceFieldCache()
+        self.components = ComponentIndex()
+
+    def make_row_views(self):
+        # signed view over the byte buffer, so walls read back as -1 rather than 255
+        cells = memoryview(self.cells).cast('b')
+        return [cells[row * self.columns:(row + 1) * self.columns] for row in range(self.rows)]
+
+    def reset(self):
+        self.fill(0) # resets grid, setting all cells to 0 (empty)
+        self.start_node_pos = self.end_node_pos = None
+        self.path = None
+        self.seed = None
+
+    def fill(self, cell_type):
+        # sets every cell in the grid to cell_type in one operation
+        self.cells[:] = bytes([cell_type & 0xff]) * len(self.cells)
+        self.edited()
+
+    # a separate grid with the same cells, start and end nodes, e.g. for searching in the background while this one
+    # is edited. cached distance fields and components aren't copied
+    def copy(self):
+        grid = type(self)(self.rows, self.columns, self.grid_size, bytearray(as_bytes(self.cells)))
+        grid.start_node_pos, grid.end_node_pos = self.start_node_pos, self.end_node_pos
+        grid.seed = self.seed
+        grid.version = self.version
+        return grid
+
+    # call after changing walls, weights or the start/end nodes directly through grid.grid or grid.cells
+    def edited(self):
+        self.version += 1
+
+    # cached distance to target from every cell, see distance_field.py. repeated queries to the same
+    # target don't search again until the grid is edited
+    def distance_field(self, target):
+        return self.distance_fields.get(self, target)
+
+    # true if there is any route between two cells, answered from the connected regions of open cells, which
+    # are only worked out again after walls have changed
+    def is_reachable(self, start, end):
+        return self.components.connected(self, start, end)
+
+    # takes over the regions labelled on a copy of this grid (e.g. by a search on the worker's thread), so they
+    # aren't labelled again here. only done if the copy's labels are current and neither grid has been edited since
+    def take_components(self, copy):
+        components = copy.components
+        if components.current(copy) and copy.version == self.version:
+            components.snapshot.grid = self
+            self.components = components
+
+    # CellSnapshot of the cells through table, for structures that need to find out which cells an edit changed
+    def snapshot(self, table):
+        return CellSnapshot(self, table)
+
+    # a working array with an entry for every cell, all set to value, for searches to keep distances or parents in
+    def cell_array(self, typecode, value=0):
+        return array(typecode, [value]) * len(self.cells)
+
+    def count_cells(self, cell_type):
+        # number of cells of a given type, e.g. count_cells(-1) for walls
+        return as_bytes(self.cells).count(cell_type & 0xff)
+
+    def reset_explored_nodes(self):
+        # resets explored nodes, so grid is ready to be searched again
+        self.cells[:] = as_bytes(self.cells).translate(CLEAR_EXPLORED)
+
+    def randomise_walls(self, probability_of_wall=0.1):
+        # gives each cell in the grid a probability_of_wall chance of becoming a wall node
+        # one random byte is drawn per cell, so the probability is rounded to the nearest 1/256
+        size = len(self.cells)
+        threshold = round(probability_of_wall * 256)
+        wall_table = bytes(255 if value < threshold else 0 for value in range(256))
+        walls = random.randbytes(size).translate(wall_table)
+        # start and end nodes are masked out so they never become walls
+        mask = int.from_bytes(walls, 'big') & int.from_bytes(as_bytes(self.cells).translate(NOT_START_OR_END), 'big')
+        self.cells[:] = (int.from_bytes(self.cells, 'big') | mask).to_bytes(size, 'big') # -1 represents a wall node
+        self.edited()
+
+    def randomise_weights(self, probability_of_weight=0.2):
+        # gives each empty cell a probability_of_weight chance of becoming weighted terrain,
+        # the terrain type is picked uniformly from WEIGHTED_NODE_COSTS
+        size = len(self.cells)
+        weight_types = sorted(WEIGHTED_NODE_COSTS)
+        threshold = round(probability_of_weight * 256)
+        weight_table = bytes(weight_types[value * len(weight_types) // threshold] if value < threshold else 0 for value in range(256))
+        weights = random.randbytes(size).translate(weight_table)
+        # only empty cells are painted, everything else is left as it is
+        mask = int.from_bytes(weights, 'big') & int.from_bytes(as_bytes(self.cells).translate(ONLY_EMPTY), 'big')
+        self.cells[:] = (int.from_bytes(self.cells, 'big') | mask).to_bytes(size, 'big')
+        self.edited()
+
+    def is_weighted(self):
+        # true if any cell costs more than 1 to move into
+        cells = as_bytes(self.cells)
+        return any(cells.count(cell_type) for cell_type in WEIGHTED_NODE_COSTS)
+
+    # the grid in the maze file format, explored nodes aren't saved. walls are bit-packed unless the grid
+    # has weights, packed=False always stores a byte per cell (bigger, but can be loaded with mmap)
+    def to_bytes(self, packed=None):
+        if packed is None:
+            packed = not self.is_weighted()
+        elif packed and self.is_weighted():
+            raise ValueError("weighted grids can't be bit-packed")
+        check_seed(self.seed)
+        flags = (0 if packed else BYTE_PER_CELL) | (0 if self.seed is None else HAS_SEED)
+        start_row, start_column = self.start_node_pos or (-1, -1)
+        end_row, end_column = self.end_node_pos or (-1, -1)
+        header = MAZE_FILE_HEADER.pack(MAZE_FILE_MAGIC, MAZE_FILE_VERSION, flags, self.rows, self.columns,
+                                       start_row, start_column, end_row, end_column, self.seed or 0)
+        cells = as_bytes(self.cells).translate(CLEAR_EXPLORED)
+        if not packed:
+            return header + cells
+        # every cell becomes an ascii 0 or 1, padded to whole bytes, which python turns into an int in linear time
+        bits = cells.translate(WALLS_TO_BITS) + b"0" * (-len(cells) % 8)
+        return header + int(bits, 2).to_bytes(len(bits) // 8, 'big')
+
+    def save(self, path, packed=None):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes(packed))
+
+    @classmethod
+    def read_header(cls, data):
+        if len(data) < MAZE_FILE_HEADER.size:
+            raise ValueError("not a maze file")
+        magic, version, flags, rows, columns, start_row, start_column, end_row, end_column, seed = MAZE_FILE_HEADER.unpack_from(data)
+        if magic != MAZE_FILE_MAGIC:
+            raise ValueError("not a maze file")
+        if version != MAZE_FILE_VERSION:
+            raise ValueError("unsupported maze file version: " + str(version))
+        size = rows * columns if flags & BYTE_PER_CELL else (rows * columns + 7) // 8
+        if len(data) < MAZE_FILE_HEADER.size + size:
+            raise ValueError("maze file is truncated")
+        return flags, rows, columns, (start_row, start_column), (end_row, end_column), seed
+
+    # places the start and end nodes and seed read from a header onto a grid
+    def apply_header(self, flags, start, end, seed):
+        self.start_node_pos = start if start[0] >= 0 else None
+        self.end_node_pos = end if end[0] >= 0 else None
+        self.seed = seed if flags & HAS_SEED else None
+
+    @classmethod
+    def from_bytes(cls, data, grid_size=None):
+        flags, rows, columns, start, end, seed = cls.read_header(data)
+        size = rows * columns
+        cells = data[MAZE_FILE_HEADER.size:]
+        if flags & BYTE_PER_CELL:
+            cells = bytearray(cells[:size])
+        else:
+            bits = format(int.from_bytes(cells[:(size + 7) // 8], 'big'), "0{}b".format((size + 7) // 8 * 8))
+            cells = bytearray(bits[:size].encode().translate(BITS_TO_WALLS))
+            # only walls are in the bits, start and end are put back from the header
+            for node, cell_type in ((start, 1), (end, 2)):
+                if node[0] >= 0:
+                    cells[node[0] * columns + node[1]] = cell_type
+        grid = cls(rows, columns, grid_size, cells)
+        grid.apply_header(flags, start, end, seed)
+        return grid
+
+    # use_mmap maps a byte-per-cell file and solves straight from the mapping instead of reading it in, pages are
+    # only read when touched so huge mazes open instantly. changes made to the grid are never written back to the file.
+    # bit-packed files have to be unpacked, so they are always read in
+    @classmethod
+    def load(cls, path, grid_size=None, use_mmap=False):
+        with open(path, "rb") as file:
+            if not use_mmap:
+                return cls.from_bytes(file.read(), grid_size)
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        flags, rows, columns, start, end, seed = cls.read_header(mapping)
+        if not flags & BYTE_PER_CELL:
+            grid = cls.from_bytes(mapping, grid_size)
+            mapping.close()
+            return grid
+        cells = memoryview(mapping)[MAZE_FILE_HEADER.size:MAZE_FILE_HEADER.size + rows * columns]
+        grid = cls(rows, columns, grid_size, cells)
+        grid.apply_header(flags, start, end, seed)
+        return grid
+
+    # (start, end) columns of every run of walls in a row, end exclusive, for jump point search
+    def wall_runs(self, row):
+        return wall_runs(bytes(self.cells[row * self.columns:(row + 1) * self.columns]))
+
+    # rows with at least one wall in them, in order
+    def wall_rows(self):
+        cells = as_bytes(self.cells)
+        return [row for row in range(self.rows) if 255 in cells[row * self.columns:(row + 1) * self.columns]]
+
+    # cells are numbered row by row, so (row, column) <-> row * columns + column
+    def to_index(self, node):
+        return node[0] * self.columns + node[1]
+
+    def to_node(self, index):
+        return divmod(index, self.columns)
+
+    # true if (row, column) is inside the grid and not a wall
+    def is_open(self, row, column):
+        return 0 <= row < self.rows and 0 <= column < self.columns and self.cells[row * self.columns + column] != 255
+
+    # flat index version of get_neighbours, used by the search engines in pathfinding.py
+    def get_neighbour_indices(self, index):
+        row, column = divmod(index, self.columns)
+        cells = self.cells
+        neighbours = []
+        # same order as get_neighbours: up, down, left, right
+        if row > 0 and cells[index - self.columns] != 255: # 255 is a wall (-1)
+            neighbours.append(index - self.columns)
+        if row < self.rows - 1 and cells[index + self.columns] != 255:
+            neighbours.append(index + self.columns)
+        if column > 0 and cells[index - 1] != 255:
+            neighbours.append(index - 1)
+        if column < self.columns - 1 and cells[index + 1] != 255:
+            neighbours.append(index + 1)
+        return neighbours
+
+    def get_neighbours(self, node):
+        #gets the neighbouring cells of a node
+        row, column = node
+        neighbours = []
+
+        for change_in_row, change_in_column in [(-1, 0), (1, 0), (0, -1), (0, 1)]: 
+            new_row, new_column = row + change_in_row, column + change_in_column
+            # checks if new position is within grid bounds, and not a wall, if so it's added to neighbours
+            if 0 <= new_row < self.rows and 0 <= new_column < self.columns and self.grid[new_row][new_column] != -1:
+                neighbours.append((new_row, new_column))
+
+        #print(neighbours)
+        return neighbours
@@ -0,0 +1,260 @@
+import heapq
+
+# entrances this long or longer get a transition at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+# hierarchical pathfinding (HPA*) - the grid is split into square clusters, and every gap in the walls along
+# a border between two clusters gets one or two transitions (a pair of cells either side of the border).
+# the transition cells are the nodes of a much smaller abstract graph, with an edge across each transition and
+# edges between the transition cells of a cluster weighted by their distance inside it. a query searches the
+# abstract graph, then only the clusters the abstract path goes through are searched to fill in the cells.
+# paths are close to the shortest, not always the shortest, since routes have to pass through transitions.
+#
+# nodes of the abstract graph are just the cell indices of the transition cells
+class HierarchicalGraph:
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_columns = -(-grid.columns // cluster_size)
+        self.snapshot = grid.snapshot(grid.move_costs)
+        self.costs = self.snapshot.cells # move cost of every cell, 0 = wall
+        self.borders = {} # (cluster, cluster to its right or below) -> [(cell, cell across the border)]
+        self.inter = {} # cell -> {cell across a border: cost of moving there}
+        # cluster -> {transition cell: [(transition cell in the same cluster, distance)] + its edges across borders}
+        self.intra = {}
+        self.segments = {} # cluster -> {(transition cell, transition cell): cells between them}, filled in by queries
+        self.nodes_expanded = 0 # abstract nodes expanded by the last query
+        for cluster in range(self.cluster_rows * self.cluster_columns):
+            self.build_borders(cluster, (1, 0), (0, 1))
+        for cluster in range(self.cluster_rows * self.cluster_columns):
+            self.build_intra(cluster)
+
+    def cluster_of(self, index):
+        row, column = divmod(index, self.grid.columns)
+        return (row // self.cluster_size) * self.cluster_columns + column // self.cluster_size
+
+    # top, left, bottom, right (bottom and right are exclusive) of a cluster in cells
+    def bounds(self, cluster):
+        cluster_row, cluster_column = divmod(cluster, self.cluster_columns)
+        top, left = cluster_row * self.cluster_size, cluster_column * self.cluster_size
+        return top, left, min(top + self.cluster_size, self.grid.rows), min(left + self.cluster_size, self.grid.columns)
+
+    # the cluster next to this one in a direction, None past the edge of the grid
+    def neighbour_cluster(self, cluster, change_in_row, change_in_column):
+        cluster_row, cluster_column = divmod(cluster, self.cluster_columns)
+        cluster_row, cluster_column = cluster_row + change_in_row, cluster_column + change_in_column
+        if 0 <= cluster_row < self.cluster_rows and 0 <= cluster_column < self.cluster_columns:
+            return cluster_row * self.cluster_columns + cluster_column
+        return None
+
+    # finds the transitions along the borders of a cluster in the given directions, replacing any found before
+    def build_borders(self, cluster, *directions):
+        columns, costs = self.grid.columns, self.costs
+        for change_in_row, change_in_column in directions:
+            neighbour = self.neighbour_cluster(cluster, change_in_row, change_in_column)
+            if neighbour is None:
+                continue
+            # borders are stored once, under the cluster above or to the left
+            key = (cluster, neighbour) if change_in_row + change_in_column > 0 else (neighbour, cluster)
+            for first, second in self.borders.pop(key, ()):
+                self.remove_inter(first, second)
+                self.remove_inter(second, first)
+
+            top, left, bottom, right = self.bounds(min(key))
+            if change_in_column: # border to the right of min(key)
+                pairs = [(row * columns + right - 1, row * columns + right) for row in range(top, bottom)]
+            else:
+                pairs = [((bottom - 1) * columns + column, bottom * columns + column) for column in range(left, right)]
+            # runs of pairs open on both sides, each run is an entrance
+            transitions = []
+            run = []
+            for pair in pairs + [None]:
+                if pair is not None and costs[pair[0]] and costs[pair[1]]:
+                    run.append(pair)
+                    continue
+                if len(run) >= LONG_ENTRANCE:
+                    transitions += [run[0], run[-1]]
+                elif run:
+                    transitions.append(run[len(run) // 2])
+                run = []
+            self.borders[key] = transitions
+            for first, second in transitions:
+                self.inter.setdefault(first, {})[second] = costs[second]
+                self.inter.setdefault(second, {})[first] = costs[first]
+
+    def remove_inter(self, cell, other):
+        edges = self.inter.get(cell)
+        if edges is not None:
+            edges.pop(other, None)
+            if not edges:
+                del self.inter[cell]
+
+    # transition cells inside a cluster, from the borders on all four sides
+    def transitions(self, cluster):
+        cells = set()
+        for change_in_row, change_in_column in ((1, 0), (0, 1)):
+            neighbour = self.neighbour_cluster(cluster, change_in_row, change_in_column)
+            if neighbour is not None:
+                cells.update(first for first, second in self.borders[(cluster, neighbour)])
+            neighbour = self.neighbour_cluster(cluster, -change_in_row, -change_in_column)
+            if neighbour is not None:
+                cells.update(second for first, second in self.borders[(neighbour, cluster)])
+        return cells
+
+    # distances between every pair of transition cells in a cluster, moving only inside it. the edges across
+    # borders are copied in too so a query has a single list per node, any border change rebuilds both sides
+    def build_intra(self, cluster):
+        nodes = self.transitions(cluster)
+        edges = {}
+        for node in nodes:
+            dists, parents = self.search_cluster(cluster, node)
+            edges[node] = [(other, dists[other]) for other in nodes if other != node and other in dists]
+            edges[node] += self.inter[node].items()
+        self.intra[cluster] = edges
+        self.segments.pop(cluster, None)
+
+    # dijkstra from source that doesn't leave the cluster, returns ({cell: distance}, {cell: parent}).
+    # reverse gives distances to source instead of from it (the cost of each step is the cell being left),
+    # and parents that point towards source. given stop_at, it's an astar search that stops once stop_at is reached
+    def search_cluster(self, cluster, source, reverse=False, stop_at=None):
+        top, left, bottom, right = self.bounds(cluster)
+        columns, costs = self.grid.columns, self.costs
+        if stop_at is not None:
+            stop_row, stop_column = divmod(stop_at, columns)
+        dists = {source: 0}
+        parents = {source: source}
+        queue = [(0, 0, source)]
+        while queue:
+            f, dist, current = heapq.heappop(queue)
+            if dist > dists[current]:
+                continue
+            if current == stop_at:
+                break
+            row, column = divmod(current, columns)
+            step = costs[current] if reverse else 0
+            for neighbour, inside in ((current - columns, row > top), (current + columns, row < bottom - 1),
+                                      (current - 1, column > left), (current + 1, column < right - 1)):
+                if inside and costs[neighbour]:
+                    new_dist = dist + (step if reverse else costs[neighbour])
+                    if new_dist < dists.get(neighbour, new_dist + 1):
+                        dists[neighbour] = new_dist
+                        parents[neighbour] = current
+                        if stop_at is None:
+                            heapq.heappush(queue, (new_dist, new_dist, neighbour))
+                        else:
+                            row, column = divmod(neighbour, columns)
+                            remaining = abs(row - stop_row) + abs(column - stop_column)
+                            heapq.heappush(queue, (new_dist + remaining, new_dist, neighbour))
+        return dists, parents
+
+    # brings the abstract graph up to date after walls or weights have changed. only clusters with changed
+    # cells have their borders found again, and only they and the clusters across those borders are re-searched
+    def refresh(self):
+        changed_cells = self.snapshot.update()
+        if not changed_cells:
+            return 0
+        self.costs = self.snapshot.cells
+        changed = {self.cluster_of(index) for index in changed_cells}
+        affected = set(changed)
+        for cluster in changed:
+            self.build_borders(cluster, (1, 0), (0, 1), (-1, 0), (0, -1))
+            for direction in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+                neighbour = self.neighbour_cluster(cluster, *direction)
+                if neighbour is not None:
+                    affected.add(neighbour)
+        for cluster in affected:
+            self.build_intra(cluster)
+        return len(affected)
+
+    # path of (row, column) from start to end, None if there isn't one. picks up any edits to the grid first
+    def find_path(self, start, end):
+        self.refresh()
+        grid = self.grid
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        self.nodes_expanded = 0
+        if not self.costs[start_index] or not self.costs[end_index]:
+            return None
+        start_cluster, end_cluster = self.cluster_of(start_index), self.cluster_of(end_index)
+        # start and end are joined to the transitions of their clusters for this query only
+        start_dists, start_parents = self.search_cluster(start_cluster, start_index)
+        end_dists, end_next = self.search_cluster(end_cluster, end_index, reverse=True)
+        start_edges = [(node, start_dists[node]) for node in self.transitions(start_cluster) if node in start_dists]
+        end_edges = {node: end_dists[node] for node in self.transitions(end_cluster) if node in end_dists}
+
+        goal = -1 # stands in for the end in the abstract search, reached from the end cluster's transitions
+        end_row, end_column = end
+        best = {start_index: 0}
+        came_from = {start_index: None}
+        queue = [(0, 0, start_index)]
+        if start_index in end_dists:
+            # start and end share a cluster, going straight there is an option too
+            best[goal] = end_dists[start_index]
+            came_from[goal] = start_index
+            heapq.heappush(queue, (best[goal], -best[goal], goal))
+
+        while queue:
+            f, dist, node = heapq.heappop(queue)
+            dist = -dist
+            if dist > best[node]:
+                continue
+            if node == goal:
+                break
+            self.nodes_expanded += 1
+            if node == start_index:
+                # the start may be a transition cell itself, so it keeps any edge across a border
+                edges = start_edges + list(self.inter.get(node, {}).items())
+            else:
+                edges = self.intra[self.cluster_of(node)][node]
+            if node in end_edges:
+                edges = edges + [(goal, end_edges[node])]
+            for neighbour, cost in edges:
+                new_dist = dist + cost
+                if new_dist < best.get(neighbour, new_dist + 1):
+                    best[neighbour] = new_dist
+                    came_from[neighbour] = node
+                    if neighbour == goal:
+                        remaining = 0
+                    else:
+                        row, column = divmod(neighbour, grid.columns)
+                        remaining = abs(row - end_row) + abs(column - end_column)
+                    heapq.heappush(queue, (new_dist + remaining, -new_dist, neighbour))
+
+        if goal not in came_from:
+            return None
+        abstract_path = [goal]
+        while came_from[abstract_path[-1]] is not None:
+            abstract_path.append(came_from[abstract_path[-1]])
+        abstract_path.reverse()
+        return self.refine(abstract_path, start_index, start_parents, end_next)
+
+    # fills in the cells between each pair of nodes on the abstract path. the cells between two transitions of a
+    # cluster are kept until that cluster is rebuilt, so later paths through the same clusters are filled in faster
+    def refine(self, abstract_path, start_index, start_parents, end_next):
+        cells = [start_index]
+        for node, next_node in zip(abstract_path, abstract_path[1:]):
+            if next_node == -1:
+                # the last stretch follows the search made back from the end
+                current = node
+                while end_next[current] != current:
+                    current = end_next[current]
+                    cells.append(current)
+            elif self.cluster_of(node) != self.cluster_of(next_node):
+                cells.append(next_node) # across a border
+            elif node == start_index:
+                cells += self.walk_back(start_parents, start_index, next_node)
+            else:
+                segments = self.segments.setdefault(self.cluster_of(node), {})
+                if (node, next_node) not in segments:
+                    dists, parents = self.search_cluster(self.cluster_of(node), node, stop_at=next_node)
+                    segments[(node, next_node)] = self.walk_back(parents, node, next_node)
+                cells += segments[(node, next_node)]
+        return [self.grid.to_node(index) for index in cells]
+
+    # cells from just after source up to target, following parents back from target
+    def walk_back(self, parents, source, target):
+        cells = []
+        while target != source:
+            cells.append(target)
+            target = parents[target]
+        return cells[::-1]
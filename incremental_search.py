@@ -0,0 +1,113 @@
+from array import array
+import heapq
+
+from pathfinding import UNREACHED
+
+# lifelong planning a* (LPA*) - a shortest path search that keeps its state between queries, so after walls or
+# weights are edited only the cells whose distance from the start is affected are searched again.
+#
+# every cell has g, its distance from start as of the last search, and rhs, the best distance its neighbours
+# offer now (min neighbour g + the cost of moving into the cell). cells where the two differ are inconsistent and
+# sit on the queue, ordered like astar. an edit only changes the rhs of the edited cell, so replanning starts from
+# there and stops as soon as the end's distance can't change any more
+class IncrementalPlanner:
+    def __init__(self, grid, start, end):
+        self.grid = grid
+        self.start = grid.to_index(start)
+        self.end = grid.to_index(end)
+        self.end_row, self.end_column = end
+        self.snapshot = grid.snapshot(grid.move_costs)
+        self.costs = self.snapshot.cells # move cost of every cell when last planned, 0 = wall
+        self.g = array('q', [UNREACHED]) * len(grid.cells)
+        self.rhs = array('q', [UNREACHED]) * len(grid.cells)
+        self.queue = [] # (key, index), may hold stale entries that are skipped when popped
+        self.nodes_expanded = 0
+        self.rhs[self.start] = 0
+        self.push(self.start)
+
+    def key(self, index):
+        row, column = divmod(index, self.grid.columns)
+        distance = min(self.g[index], self.rhs[index])
+        return distance + abs(row - self.end_row) + abs(column - self.end_column), distance
+
+    def push(self, index):
+        first, second = self.key(index)
+        heapq.heappush(self.queue, (first, second, index))
+
+    # neighbours inside the grid, walls included, as a wall's distance still has to be updated when it's placed
+    def neighbours(self, index):
+        row, column = divmod(index, self.grid.columns)
+        neighbours = []
+        if row > 0:
+            neighbours.append(index - self.grid.columns)
+        if row < self.grid.rows - 1:
+            neighbours.append(index + self.grid.columns)
+        if column > 0:
+            neighbours.append(index - 1)
+        if column < self.grid.columns - 1:
+            neighbours.append(index + 1)
+        return neighbours
+
+    # recalculates rhs for a cell and queues it if it's now inconsistent
+    def update_cell(self, index):
+        if index != self.start:
+            cost = self.costs[index]
+            best = min(self.g[neighbour] for neighbour in self.neighbours(index))
+            self.rhs[index] = UNREACHED if cost == 0 or best == UNREACHED else best + cost
+        if self.g[index] != self.rhs[index]:
+            self.push(index)
+
+    def compute_shortest_path(self):
+        g, rhs, queue = self.g, self.rhs, self.queue
+        while queue:
+            first, second, index = queue[0]
+            if g[index] == rhs[index]:
+                heapq.heappop(queue) # stale, the cell became consistent after it was queued
+                continue
+            key = self.key(index)
+            if (first, second) != key:
+                heapq.heapreplace(queue, (key[0], key[1], index)) # stale key, requeued with the right one
+                continue
+            # done once nothing left on the queue could shorten the path to the end
+            if key >= self.key(self.end) and g[self.end] == rhs[self.end]:
+                break
+            heapq.heappop(queue)
+            self.nodes_expanded += 1
+            if g[index] > rhs[index]:
+                g[index] = rhs[index] # distance went down, neighbours may now be closer through this cell
+            else:
+                g[index] = UNREACHED # distance went up (e.g. a wall was placed), so it's worked out again
+                self.update_cell(index)
+            for neighbour in self.neighbours(index):
+                self.update_cell(neighbour)
+
+    # picks up any cells whose move cost changed since the last plan (walls or weights drawn or erased),
+    # nothing is compared unless the grid has been edited since
+    def apply_edits(self):
+        changed = self.snapshot.update()
+        self.costs = self.snapshot.cells
+        for index in changed:
+            self.update_cell(index)
+        return len(changed)
+
+    # carries on planning on another grid with the same cells, e.g. the grid on screen after the planner was made on
+    # the worker's copy of it
+    def use_grid(self, grid):
+        self.grid = grid
+        self.snapshot.grid = grid
+
+    # shortest path from start to end after taking in any edits, None if there isn't one.
+    # nodes_expanded counts only the cells this replan had to search again
+    def replan(self):
+        self.nodes_expanded = 0
+        self.apply_edits()
+        self.compute_shortest_path()
+        if self.costs[self.start] == 0 or self.g[self.end] == UNREACHED:
+            return None
+        # walks back from the end, always to the neighbour closest to the start
+        path = [self.end]
+        current = self.end
+        while current != self.start:
+            current = min((neighbour for neighbour in self.neighbours(current) if self.costs[neighbour]), key=self.g.__getitem__)
+            path.append(current)
+        return [self.grid.to_node(index) for index in reversed(path)]
@@ -0,0 +1,85 @@
+from collections import deque
+import json
+import time
+
+# phases of a frame of the main loop, in the order they run
+PHASES = ("events", "mouse", "update", "draw_grid", "draw_buttons", "flip")
+
+# counters for one search, filled in by Pathfinding.solve when passed as stats=
+class SearchStats:
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.nodes_expanded = 0
+        self.edges_relaxed = 0 # times a cell got a new best distance and was queued
+        self.peak_frontier = 0 # most cells queued but not yet expanded at once
+        self.search_time = 0 # seconds spent searching
+        self.draw_time = 0 # seconds spent drawing the search, in on_explore or while its playback runs
+
+    def relaxed(self):
+        self.edges_relaxed += 1
+
+    def expanded(self, nodes_expanded):
+        self.nodes_expanded = nodes_expanded
+        # every queued cell comes from a relaxation, the start cell(s) aside
+        frontier = self.edges_relaxed - nodes_expanded + 1
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+
+    def as_dict(self):
+        return {"algorithm": self.algorithm, "nodes_expanded": self.nodes_expanded, "edges_relaxed": self.edges_relaxed,
+                "peak_frontier": self.peak_frontier, "search_time": self.search_time, "draw_time": self.draw_time}
+
+# times each phase of every frame while enabled, keeping the last history frames. when disabled every call
+# returns after a single attribute check, so the main loop can call it unconditionally
+class FrameProfiler:
+    def __init__(self, history=600):
+        self.enabled = False
+        self.frames = deque(maxlen=history) # {phase: seconds, "frame": seconds} for each recorded frame
+        self.searches = deque(maxlen=100) # SearchStats of searches run while enabled
+        self.current = None # timings of the frame being recorded, None when not recording
+        self.last = 0
+
+    def toggle(self):
+        # takes effect from the next frame
+        self.enabled = not self.enabled
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.last = self.frame_start = time.perf_counter()
+        self.current = {}
+
+    # ends the current phase, the time since the previous mark (or the start of the frame) is put down to it
+    def mark(self, phase):
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0) + now - self.last
+        self.last = now
+
+    # animating is true while a search is being played back, its drawing time is added to that search's stats
+    def end_frame(self, animating=False):
+        if self.current is None:
+            return
+        self.current["frame"] = time.perf_counter() - self.frame_start
+        self.frames.append(self.current)
+        if animating and self.searches:
+            self.searches[-1].draw_time += self.current.get("draw_grid", 0)
+        self.current = None
+
+    def new_search(self, algorithm):
+        stats = SearchStats(algorithm)
+        self.searches.append(stats)
+        return stats
+
+    # mean seconds per phase over the last frames recorded
+    def averages(self, frames=60):
+        recent = list(self.frames)[-frames:]
+        if not recent:
+            return {}
+        return {phase: sum(frame.get(phase, 0) for frame in recent) / len(recent) for phase in PHASES + ("frame",)}
+
+    def export(self, path):
+        with open(path, "w") as file:
+            json.dump({"phases": PHASES, "frames": list(self.frames),
+                       "searches": [stats.as_dict() for stats in self.searches]}, file, indent=1)
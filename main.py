@@ -1,58 +1,43 @@
 import pygame
 import sys
 import os
-import tkinter as tk
-from tkinter import messagebox
-from tkinter import ttk
-from tkinter import * 
-from tkinter.ttk import *
-import random
 from settings import *
 import time
-
-class Grid:
-    def __init__(self, rows, columns, grid_size):
-        self.rows = rows
-        self.columns = columns
-        self.grid_size = grid_size
-        self.grid = [[0] * columns for _ in range(rows)] # initalises grid, setting all cells to 0 (empty)
-        self.start_node_pos = None
-        self.end_node_pos = None
-        self.path = None
-
-    def reset(self):
-        self.grid = [[0] * self.columns for _ in range(self.rows)] # resets grid, setting all cells to 0 (empty)
-        self.start_node_pos = self.end_node_pos = None
-        self.path = None
-        maze_solver.node_pos = None
-
-    def reset_explored_nodes(self):
-        # resets explored nodes, so grid is ready to be searched again
-        for row in range(self.rows):
-            for column in range(self.columns):
-                if self.grid[row][column] == 3: # 3 represents a explored node
-                    self.grid[row][column] = 0
-
-    def randomise_walls(self, probability_of_wall=0.1):
-        # gives each cell in the grid a probability_of_wall chance of becoming a wall node
-        for row in range(self.rows):
-            for column in range(self.columns):
-                if self.grid[row][column] not in [1, 2] and random.random() < probability_of_wall:
-                    self.grid[row][column] = -1 # -1 represents a wall node
-
-    def get_neighbours(self, node):
-        #gets the neighbouring cells of a node
-        row, column = node
-        neighbours = []
-
-        for change_in_row, change_in_column in [(-1, 0), (1, 0), (0, -1), (0, 1)]: 
-            new_row, new_column = row + change_in_row, column + change_in_column
-            # checks if new position is within grid bounds, and not a wall, if so it's added to neighbours
-            if 0 <= new_row < self.rows and 0 <= new_column < self.columns and self.grid[new_row][new_column] != -1:
-                neighbours.append((new_row, new_column))
-
-        #print(neighbours)
-        return neighbours
+from collections import deque
+from grid import Grid
+from pathfinding import Pathfinding, HEURISTICS
+from maze_generator import MazeGenerator, GENERATORS
+from renderer import GridRenderer, TextLabel, Viewport
+from search_trace import SearchTrace, TracePlayback
+from incremental_search import IncrementalPlanner
+from instrumentation import FrameProfiler, PHASES
+from search_worker import SearchWorker, PROGRESS, DONE, CANCELLED, FAILED
+
+# images for the help window are looked for next to this file, wherever it's run from
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# tkinter is slow to import and slower to start, so it's only loaded the first time a dialog or the help
+# window is needed, and the one hidden root window made then is reused for every dialog after it
+tk_root = None
+
+def get_tk_root():
+    global tk_root
+    if tk_root is None:
+        import tkinter
+        tk_root = tkinter.Tk()
+        tk_root.withdraw()
+    return tk_root
+
+def show_error(message):
+    from tkinter import messagebox
+    messagebox.showerror("Error", message, parent=get_tk_root())
+
+# the profiling panel gets a column of its own on the right of the window while it's shown
+PROFILE_PANEL_WIDTH = 200
+PROFILE_PANEL_MARGIN = 10
+
+# arrow key: (change in row, change in column) for moving the user controlled node
+MOVE_KEYS = {pygame.K_UP: (-1, 0), pygame.K_DOWN: (1, 0), pygame.K_LEFT: (0, -1), pygame.K_RIGHT: (0, 1)}
 
 class Interface:
     def __init__(self, grid, max_grid_height, max_grid_width):
@@ -60,147 +45,369 @@ class Interface:
         self.max_grid_height = max_grid_height 
         self.max_grid_width = max_grid_width
         self.max_grid_dimension = max(MAX_GRID_WIDTH, MAX_GRID_HEIGHT)
-        self.grid_size = min(max_grid_width // grid.columns, max_grid_height // grid.rows)
-        self.width = grid.columns * self.grid_size  
-        self.height = grid.rows * self.grid_size 
+        # the viewport starts zoomed out to fit the whole grid, and can be zoomed and panned from there
+        self.viewport = Viewport(grid, max_grid_width, max_grid_height)
+        self.width = self.viewport.width
+        self.height = self.viewport.height
         self.placing_start = False
         self.placing_end = False
         self.placing_wall = False
         self.path = None
+        self.astar_heuristic = "manhattan"
+        self.bidirectional = False # when true the bfs/dijkstra buttons search from both ends
+        self.maze_algorithm = "backtracker"
+        self.playback = None # TracePlayback animating the last search
+        self.no_solution_shown = False
+        self.live_replan = True # when true the path is repaired as walls are drawn after a search
+        self.planner = None # IncrementalPlanner for the current start and end, made by the worker along with a search
+        self.profiler = FrameProfiler() # p shows the profiling panel, e exports what it has recorded
+        self.profile_lines = [] # panel text, re-rendered a couple of times a second so it can be read
+        self.profile_updated = 0
+        self.help_window = None # tkinter help window, built the first time "?" is clicked
+        self.help_images = [] # the help window's images, kept here so tkinter doesn't lose them
+        self.worker = SearchWorker() # searches and maze generation run on its thread, escape cancels them
+        self.worker_text = "" # progress of the running job, or that it was cancelled
+
+        pygame.init()
 
         # initialize button coordinates
         self.reset_button_rect = pygame.Rect(10, self.height + 10, 100, 30)
         self.randomise_button_rect = pygame.Rect(self.reset_button_rect.right + 10, self.height +10, 220, 30)
         self.generate_maze_button_rect = pygame.Rect(self.randomise_button_rect.right + 10, self.height + 10, 200, 30)
         self.info_button_rect = pygame.Rect(self.generate_maze_button_rect.right + 50, self.height +10, 50, 30)
-        self.bfs_button_rect = pygame.Rect(550,200,75,50)
-        self.dijkstra_button_rect = pygame.Rect(550, 300, 100, 50)
-        self.solve_button_rect = pygame.Rect(550, 400, 100, 50)
-
-        pygame.init()
-        self.window = pygame.display.set_mode((self.height + 230, self.width + 50), 0,0)
+        self.bfs_button_rect = pygame.Rect(550, 160, 75, 40)
+        self.dijkstra_button_rect = pygame.Rect(550, 210, 100, 40)
+        self.astar_button_rect = pygame.Rect(550, 260, 75, 40)
+        self.jps_button_rect = pygame.Rect(550, 310, 75, 40)
+        self.solve_button_rect = pygame.Rect(550, 360, 100, 40)
+        self.weights_button_rect = pygame.Rect(550, 410, 110, 40)
+
+        self.sidebar_right = self.height + 230 # right hand edge of the sidebar, the profiling panel goes after it
+        self.set_window()
         pygame.display.set_caption("Maze generation and pathfinding visualiser")
 
-    def draw_grid(self):
-        # colours cell depending on what type of node it is
-        for row in range(self.grid.rows):
-            for column in range(self.grid.columns):
-                colour = WHITE
-                if self.grid.grid[row][column] == 1:
-                    colour = START_COLOUR
-                elif self.grid.grid[row][column] == 2:
-                    colour = END_COLOUR
-                elif self.grid.grid[row][column] == -1:
-                    colour = WALL_COLOUR
-                elif self.grid.grid[row][column] == 3:
-                    colour = PREV_EXPLORED_COLOUR
-                elif self.grid.grid[row][column] == 4:
-                    colour = CURRENT_EXPLORED_COLOUR
-                elif self.grid.grid[row][column] == 5:
-                    colour = USER_CONTROLLED_COLOUR
-
-                pygame.draw.rect(self.window, colour, (column * self.grid_size, row * self.grid_size, self.grid_size, self.grid_size))
-
-        # draws horizontal + vertical grid lines
-        for i in range(0, self.grid.rows):
-            pygame.draw.line(self.window, BLACK, (0, i * self.grid_size), (self.width, i * self.grid_size))
-        for j in range(0, self.grid.columns):
-            pygame.draw.line(self.window, BLACK, (j * self.grid_size, 0), (j * self.grid_size, self.height))
-
-    # method to draw all buttons on interface
-    def draw_buttons(self, reset_button_rect, bfs_button_rect, randomise_walls_button_rect, info_button_rect, dijkstra_button_rect, generate_maze_button_rect, solve_button_rect, font):
-        # checks if the mouse is over the buttons (to add 'hovering' effect)
-        reset_hovered = reset_button_rect.collidepoint(pygame.mouse.get_pos())
-        bfs_hovered = bfs_button_rect.collidepoint(pygame.mouse.get_pos())
-        dijkstra_hovered = dijkstra_button_rect.collidepoint(pygame.mouse.get_pos())
-        randomise_hovered = randomise_walls_button_rect.collidepoint(pygame.mouse.get_pos())
-        info_hovered = info_button_rect.collidepoint(pygame.mouse.get_pos())
-        generate_maze_hovered = generate_maze_button_rect.collidepoint(pygame.mouse.get_pos())
-        solve_hovered = solve_button_rect.collidepoint(pygame.mouse.get_pos())
-
-        # each button is drawn below
-
-        pygame.draw.rect(self.window, (191, 191, 191) if reset_hovered else (211, 211, 211), reset_button_rect)
-        reset_text = font.render("Reset", True, BLACK)
-        self.window.blit(reset_text, (reset_button_rect.x + 10, reset_button_rect.y + 5)) 
-
-        pygame.draw.rect(self.window, (191, 191, 191) if bfs_hovered else (211, 211, 211), bfs_button_rect)
-        bfs_text = font.render("BFS", True, BLACK)
-        self.window.blit(bfs_text, (bfs_button_rect.x + 10, bfs_button_rect.y + 5))
-
-        pygame.draw.rect(self.window, (191, 191, 191) if dijkstra_hovered else (211, 211, 211), dijkstra_button_rect)
-        dijkstra_text = font.render("Dijkstra", True, BLACK)
-        self.window.blit(dijkstra_text, (dijkstra_button_rect.x + 10, dijkstra_button_rect.y + 5))
-
-        pygame.draw.rect(self.window, (191, 191, 191) if randomise_hovered else (211, 211, 211), randomise_walls_button_rect)
-        randomise_walls_text = font.render("Randomise Walls", True, BLACK)
-        self.window.blit(randomise_walls_text, (randomise_walls_button_rect.x + 10, randomise_walls_button_rect.y + 5))
-
-        pygame.draw.rect(self.window, (191, 191, 191) if info_hovered else (211, 211, 211), info_button_rect)
-        info_text = font.render("?", True, BLACK)
-        self.window.blit(info_text, (info_button_rect.x + 15, info_button_rect.y + 5))
-
-        pygame.draw.rect(self.window, (191, 191, 191) if generate_maze_hovered else (211, 211, 211), generate_maze_button_rect)
-        generate_maze_text = font.render("Generate maze", True, BLACK)
-        self.window.blit(generate_maze_text, (generate_maze_button_rect.x +10, generate_maze_button_rect.y +5))
-
-        pygame.draw.rect(self.window, (191, 191, 191) if solve_hovered else (211, 211, 211), solve_button_rect)
-        solve_text = font.render("Solve", True, BLACK)
-        self.window.blit(solve_text, (solve_button_rect.x +10, solve_button_rect.y +5))
-
-    def draw_grid_lines(self):
-        # draws horizontal and vertical grid lines
-        for i in range(1, self.grid.rows +1):
-            pygame.draw.line(self.window, BLACK, (0, i * self.grid_size), (self.width, i * self.grid_size))
-        for j in range(1, self.grid.columns +1):
-            pygame.draw.line(self.window, BLACK, (j * self.grid_size, 0), (j * self.grid_size, self.height))
+        # the grid is kept on its own surface and only changed cells are repainted
+        self.renderer = GridRenderer(grid, self.viewport)
+
+        # button text is rendered once here, (rect, text, x offset of text)
+        font = pygame.font.Font(None, 36)
+        self.buttons = [(rect, font.render(label, True, BLACK), offset) for rect, label, offset in [
+            (self.reset_button_rect, "Reset", 10),
+            (self.bfs_button_rect, "BFS", 10),
+            (self.dijkstra_button_rect, "Dijkstra", 10),
+            (self.randomise_button_rect, "Randomise Walls", 10),
+            (self.info_button_rect, "?", 15),
+            (self.generate_maze_button_rect, "Generate maze", 10),
+            (self.solve_button_rect, "Solve", 10),
+            (self.weights_button_rect, "Weights", 10),
+            (self.astar_button_rect, "A*", 10),
+            (self.jps_button_rect, "JPS", 10)]]
+        self.hovered = {} # hover state each button was last drawn with
+
+        stats_font = pygame.font.Font(None, 24)
+        self.nodes_label = TextLabel(stats_font, (550, 460))
+        self.time_label = TextLabel(stats_font, (550, 480))
+        self.heuristic_label = TextLabel(stats_font, (550, 20))
+        self.bidirectional_label = TextLabel(stats_font, (550, 40))
+        self.maze_label = TextLabel(stats_font, (550, 60))
+        self.playback_label = TextLabel(stats_font, (550, 80))
+        self.replan_label = TextLabel(stats_font, (550, 2))
+        self.worker_label = TextLabel(stats_font, (550, 500))
+        self.profile_font = pygame.font.Font(None, 20)
+
+    # opens the window, or resizes it when the profiling panel is turned on or off
+    def set_window(self):
+        width = self.sidebar_right
+        if self.profiler.enabled:
+            width += PROFILE_PANEL_WIDTH + PROFILE_PANEL_MARGIN
+        self.window = pygame.display.set_mode((width, self.width + 50), 0,0)
+        self.full_redraw = True # set when the whole window needs drawing again, e.g. after a tkinter window
+
+    def draw_grid(self, path=None):
+        # repaints cells that changed and copies them to the window, returns the areas of the window that changed
+        dirty = self.renderer.update(path)
+        for rect in dirty:
+            self.window.blit(self.renderer.surface, rect.topleft, rect)
+        return dirty
+
+    # method to draw all buttons on interface, only buttons whose hover state changed are redrawn
+    def draw_buttons(self, force=False):
+        dirty = []
+        mouse_pos = pygame.mouse.get_pos()
+        for rect, text, offset in self.buttons:
+            # checks if the mouse is over the button (to add 'hovering' effect)
+            hovered = rect.collidepoint(mouse_pos)
+            if force or self.hovered.get(rect.topleft) != hovered:
+                self.hovered[rect.topleft] = hovered
+                pygame.draw.rect(self.window, (191, 191, 191) if hovered else (211, 211, 211), rect)
+                self.window.blit(text, (rect.x + offset, rect.y + 5))
+                dirty.append(rect)
+        return dirty
+
+    def draw_search_stats(self, force=False):
+        # shows how much work the last search did, so solvers can be compared
+        dirty = []
+        if pathfinding.nodes_expanded:
+            dirty += self.nodes_label.draw(self.window, "Expanded: {}".format(pathfinding.nodes_expanded), force)
+            dirty += self.time_label.draw(self.window, "Time: {:.1f} ms".format(pathfinding.search_time * 1000), force)
+        # current settings are listed above the timer
+        dirty += self.heuristic_label.draw(self.window, "A* heuristic: " + self.astar_heuristic, force)
+        dirty += self.bidirectional_label.draw(self.window, "Bidirectional: " + ("on" if self.bidirectional else "off"), force)
+        dirty += self.maze_label.draw(self.window, "Maze: " + self.maze_algorithm, force)
+        dirty += self.replan_label.draw(self.window, "Live replan: " + ("on" if self.live_replan else "off"), force)
+        playback_text = ""
+        if self.playback:
+            playback_text = "Playback: {}/{}{}".format(self.playback.position, len(self.playback.trace), " (paused)" if self.playback.paused else "")
+        dirty += self.playback_label.draw(self.window, playback_text, force)
+        dirty += self.worker_label.draw(self.window, self.worker_text, force)
+        return dirty
+
+    # profiling panel - average milliseconds per main loop phase and the counters from the last search, drawn in its
+    # own column to the right of the sidebar (see set_window) so it never covers the grid or the other text
+    def draw_profile(self):
+        if not self.profiler.enabled:
+            return []
+        rect = pygame.Rect(self.sidebar_right, 100, PROFILE_PANEL_WIDTH, 18 * 12 + 8)
+        if time.perf_counter() - self.profile_updated > 0.5:
+            self.profile_updated = time.perf_counter()
+            averages = self.profiler.averages()
+            lines = ["Frame: {:.2f} ms".format(averages.get("frame", 0) * 1000)]
+            lines += ["  {}: {:.2f} ms".format(phase, averages.get(phase, 0) * 1000) for phase in PHASES]
+            if self.profiler.searches:
+                stats = self.profiler.searches[-1]
+                lines += ["Search: " + stats.algorithm,
+                          "  expanded: {}".format(stats.nodes_expanded),
+                          "  relaxed: {}".format(stats.edges_relaxed),
+                          "  peak frontier: {}".format(stats.peak_frontier),
+                          "  search / draw: {:.1f} / {:.1f} ms".format(stats.search_time * 1000, stats.draw_time * 1000)]
+            self.profile_lines = [self.profile_font.render(line, True, WHITE) for line in lines]
+        self.window.fill((75, 75, 75), rect)
+        for number, line in enumerate(self.profile_lines):
+            self.window.blit(line, (rect.x + 6, rect.y + 4 + number * 18))
+        return [rect]
+
+    # draws everything that changed since the last frame, returning the areas of the window to update
+    def draw_frame(self, path):
+        force = self.full_redraw
+        if force:
+            self.window.fill(WHITE)
+            self.renderer.drawn = None
+        if self.playback and not self.playback.finished():
+            path = None # the path is shown once the search has finished animating
+        dirty = self.draw_grid(path)
+        self.profiler.mark("draw_grid")
+        dirty += self.draw_buttons(force)
+        dirty += self.draw_search_stats(force)
+        dirty += maze_solver.draw_timer(self.window, force)
+        dirty += self.draw_profile()
+        self.profiler.mark("draw_buttons")
+        if force:
+            self.full_redraw = False
+            return [self.window.get_rect()]
+        return dirty
 
     def handle_button_clicks(self, event):
         global path  
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.reset_button_rect.collidepoint(event.pos):
-                # reset button clicked
+                # reset button clicked, a search still running is stopped
+                self.worker.cancel()
                 self.grid.reset()
                 path = None  
+                self.playback = None
+                self.planner = None
                 maze_solver.stop_timer()
                 maze_solver.reset()
             elif self.bfs_button_rect.collidepoint(event.pos) and self.grid.start_node_pos and self.grid.end_node_pos:
                 # bfs button clicked
-                path = pathfinding.bfs(self.grid, self.grid.start_node_pos, self.grid.end_node_pos, self.window)
-                if path is None:
-                    root = tk.Tk()
-                    root.withdraw()
-                    messagebox.showerror("Error", "No solution to the maze")
-                    # if no solution display error message - tkinter
-                    root.destroy()
+                self.run_search("bidirectional_bfs" if self.bidirectional else "bfs")
             elif self.dijkstra_button_rect.collidepoint(event.pos) and self.grid.start_node_pos and self.grid.end_node_pos:
                 # dijkstra button clicked
-                path = pathfinding.dijkstra(self.grid, self.grid.start_node_pos, self.grid.end_node_pos, self.window)
-                if path is None:
-                    # if no solution display error message - tkinter
-                    root = tk.Tk()
-                    root.withdraw()
-                    messagebox.showerror("Error", "No solution to the maze")
-                    root.destroy()
+                self.run_search("bidirectional_dijkstra" if self.bidirectional else "dijkstra")
+            elif self.astar_button_rect.collidepoint(event.pos) and event.button == 3:
+                # right clicking a* cycles through its heuristics
+                heuristics = list(HEURISTICS)
+                self.astar_heuristic = heuristics[(heuristics.index(self.astar_heuristic) + 1) % len(heuristics)]
+            elif self.astar_button_rect.collidepoint(event.pos) and self.grid.start_node_pos and self.grid.end_node_pos:
+                # a* button clicked
+                self.run_search("astar", heuristic=self.astar_heuristic)
+            elif self.jps_button_rect.collidepoint(event.pos) and self.grid.start_node_pos and self.grid.end_node_pos:
+                # jump point search button clicked
+                self.run_search("jps")
             elif self.randomise_button_rect.collidepoint(event.pos):
                 # randomise button clicked
                 self.grid.randomise_walls()
+            elif self.weights_button_rect.collidepoint(event.pos):
+                # weights button clicked
+                self.grid.randomise_weights()
             elif self.info_button_rect.collidepoint(event.pos):
                 # info button clicked
                 self.info_button()
+                self.full_redraw = True
+            elif self.generate_maze_button_rect.collidepoint(event.pos) and event.button == 3:
+                # right clicking generate maze cycles through the maze algorithms
+                self.maze_algorithm = GENERATORS[(GENERATORS.index(self.maze_algorithm) + 1) % len(GENERATORS)]
             elif self.generate_maze_button_rect.collidepoint(event.pos):
-                # maze button clicked
-                maze_generator.initiate_maze(self.grid)
+                # maze button clicked, the maze is made on the worker's thread and put on the grid once it's done
+                self.worker.start_maze(self.grid, self.maze_algorithm)
             elif self.solve_button_rect.collidepoint(pygame.mouse.get_pos()) and self.grid.start_node_pos and self.grid.end_node_pos:
                 # solve button clicked
                 maze_solver.start_timer()
 
+    def handle_key_presses(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_b:
+            # b toggles bidirectional bfs/dijkstra
+            self.bidirectional = not self.bidirectional
+        elif event.key == pygame.K_l:
+            # l toggles repairing the path while walls are drawn
+            self.live_replan = not self.live_replan
+        elif event.key == pygame.K_p:
+            # p toggles the profiling panel, which widens the window to make room for it
+            self.profiler.toggle()
+            self.profile_updated = 0
+            self.set_window()
+        elif event.key == pygame.K_ESCAPE:
+            # escape stops a search or maze that's still running
+            self.worker.cancel()
+        elif event.key == pygame.K_e and self.profiler.frames:
+            # e writes the recorded frame and search timings out as json
+            self.profiler.export("profile.json")
+        elif self.playback:
+            # playback controls - space pauses, , and . step, [ and ] scrub, - and = change speed, enter finishes
+            if event.key == pygame.K_SPACE:
+                self.playback.toggle_pause()
+            elif event.key == pygame.K_PERIOD:
+                self.playback.step(self.playback.cells_per_frame)
+            elif event.key == pygame.K_COMMA:
+                self.playback.step(-self.playback.cells_per_frame)
+            elif event.key == pygame.K_RIGHTBRACKET:
+                self.playback.step(len(self.playback.trace) // 10)
+            elif event.key == pygame.K_LEFTBRACKET:
+                self.playback.step(-(len(self.playback.trace) // 10))
+            elif event.key == pygame.K_EQUALS:
+                self.playback.cells_per_frame *= 2
+            elif event.key == pygame.K_MINUS:
+                self.playback.cells_per_frame = max(1, self.playback.cells_per_frame // 2)
+            elif event.key == pygame.K_RETURN:
+                self.playback.finish()
+
+    def handle_view_events(self, event):
+        # mouse wheel zooms around the mouse, w a s d pan, f fits the whole grid on screen
+        if event.type == pygame.MOUSEWHEEL:
+            mouse_x, mouse_y = pygame.mouse.get_pos()
+            if self.viewport.cell_at(mouse_x, mouse_y):
+                self.viewport.zoom(event.y, (mouse_x, mouse_y))
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_w:
+                self.viewport.pan(-0.25, 0)
+            elif event.key == pygame.K_s:
+                self.viewport.pan(0.25, 0)
+            elif event.key == pygame.K_a:
+                self.viewport.pan(0, -0.25)
+            elif event.key == pygame.K_d:
+                self.viewport.pan(0, 0.25)
+            elif event.key == pygame.K_f:
+                self.viewport.fit()
+
+    def run_search(self, algorithm, **options):
+        global path
+        # the search runs on the worker's thread without drawing and records a trace, which is animated a few
+        # cells a frame once handle_worker_messages picks up the result
+        # the last search's explored cells are cleared, or they'd stay under the next animation
+        self.grid.reset_explored_nodes()
+        path = None
+        self.playback = None
+        self.planner = None
+        # an end that can't be reached is caught before searching. while the grid's regions are labelled for its
+        # current version that's a lookup and no solution shows straight away, but after an edit labelling them
+        # means going over every cell, so that's left to the worker - it labels its copy before searching, and the
+        # labels come back with the result
+        components_current = self.grid.components.current(self.grid)
+        if components_current and not self.grid.is_reachable(self.grid.start_node_pos, self.grid.end_node_pos):
+            self.worker.cancel()
+            pathfinding.nodes_expanded = 0
+            pathfinding.search_time = 0
+            self.worker_text = ""
+            show_error("No solution to the maze")
+            self.full_redraw = True
+            return
+        trace = SearchTrace()
+        stats = self.profiler.new_search(algorithm) if self.profiler.enabled else None
+        self.worker.start_search(self.grid, algorithm, plan=self.live_replan, trace=trace, stats=stats,
+                                 check_reachable=not components_current, **options)
+        self.worker_text = "Searching..."
+
+    # takes in what the worker has sent since the last frame. a job started from a grid that has been edited
+    # since (walls drawn, reset, randomised) is cancelled, as its result wouldn't match what's on screen
+    def handle_worker_messages(self):
+        global path
+        job = self.worker.job
+        if job is not None and job.version != self.grid.version:
+            job.cancel()
+        for kind, job in self.worker.poll():
+            if job is not self.worker.job:
+                continue # a job that has since been replaced by another
+            if kind == DONE and job.cancelled():
+                kind = CANCELLED
+            if kind == PROGRESS:
+                self.worker_text = "Searching: {} explored, {} on frontier".format(job.explored, job.frontier)
+            elif kind == CANCELLED:
+                self.worker_text = "Cancelled"
+            elif kind == FAILED:
+                raise job.error
+            elif job.kind == "search":
+                path = job.path
+                self.grid.take_components(job.grid)
+                if job.planner is not None:
+                    job.planner.use_grid(self.grid)
+                    self.planner = job.planner
+                pathfinding.nodes_expanded = job.nodes_expanded
+                pathfinding.search_time = job.search_time
+                self.playback = TracePlayback(self.grid, job.options["trace"], path, PLAYBACK_CELLS_PER_FRAME, PLAYBACK_FPS)
+                self.no_solution_shown = False
+                self.worker_text = ""
+            else:
+                self.grid.cells[:] = job.grid.cells
+                self.grid.seed = job.grid.seed
+                self.grid.edited()
+                self.worker_text = ""
+
+    # repairs the path after walls or terrain are drawn, only the cells the edit affects are searched again.
+    # the planner is kept between edits, so dragging a wall across the grid replans a cell at a time. it normally
+    # comes from the worker with the search, one is only planned from scratch here if there isn't one for this
+    # start and end (e.g. live replan was turned on after the search)
+    def replan(self):
+        global path
+        if not self.live_replan or not self.playback or not self.playback.finished():
+            return
+        start, end = self.grid.start_node_pos, self.grid.end_node_pos
+        if self.planner is None or self.planner.start != self.grid.to_index(start) or self.planner.end != self.grid.to_index(end):
+            self.planner = IncrementalPlanner(self.grid, start, end)
+        start_time = time.perf_counter()
+        path = self.planner.replan()
+        pathfinding.nodes_expanded = self.planner.nodes_expanded
+        pathfinding.search_time = time.perf_counter() - start_time
+
+    # moves the search animation on by dt seconds
+    def update_playback(self, dt):
+        if not self.playback:
+            return
+        self.playback.update(dt)
+        if self.playback.finished() and self.playback.path is None and not self.no_solution_shown:
+            # if no solution display error message - tkinter
+            self.no_solution_shown = True
+            show_error("No solution to the maze")
+            self.full_redraw = True
+
     def handle_mouse_events(self):
         # handles user-grid interaction with mouse
         mouse_buttons = pygame.mouse.get_pressed()
         mouse_x, mouse_y = pygame.mouse.get_pos()
         #mouse_y = pygame.mouse.get_pos()
-        row, column = mouse_y // self.grid_size, mouse_x // self.grid_size
+        # cell under the mouse, (-1, -1) when it's outside the grid so the bounds checks below fail
+        row, column = self.viewport.cell_at(mouse_x, mouse_y) or (-1, -1)
 
         if mouse_buttons[0] and not self.placing_end:
             if 0 <= row < self.grid.rows and 0 <= column < self.grid.columns and self.grid.grid[row][column] == 0:
@@ -208,6 +415,7 @@ class Interface:
                     self.grid.grid[row][column] = 1  # start node
                     self.placing_start = True
                     self.grid.start_node_pos = (row, column)
+                    self.grid.edited()
 
         elif mouse_buttons[2] and not self.placing_start and not self.placing_end:
             if 0 <= row < self.grid.rows and 0 <= column < self.grid.columns and self.grid.grid[row][column] == 0:
@@ -215,44 +423,54 @@ class Interface:
                     self.grid.grid[row][column] = 2  # end node
                     self.placing_end = True
                     self.grid.end_node_pos = (row, column)
+                    self.grid.edited()
 
         elif mouse_buttons[1]:
             if 0 <= row < self.grid.rows and 0 <= column < self.grid.columns:
-                self.grid.grid[row][column] = -1  # wall
+                # holding 1, 2 or 3 paints weighted terrain instead of walls
+                keys = pygame.key.get_pressed()
+                if keys[pygame.K_1]:
+                    cell_type = 6
+                elif keys[pygame.K_2]:
+                    cell_type = 7
+                elif keys[pygame.K_3]:
+                    cell_type = 8
+                else:
+                    cell_type = -1  # wall
                 self.drawing_wall = True
+                # the button is held over the same cell for many frames, it only counts as an edit when the cell changes
+                if self.grid.grid[row][column] != cell_type:
+                    self.grid.grid[row][column] = cell_type
+                    self.grid.edited()
+                    self.replan()
 
         elif not any(mouse_buttons):
             self.placing_start = self.placing_end = self.drawing_wall = False
 
     
-    def draw_path(self, path):
-        # draws path if it exists
-        #print(path)
-        if path:
-            for node in path[1:-1]:
-                row, column = node
-                pygame.draw.rect(self.window, BLUE, (column * self.grid_size, row * self.grid_size, self.grid_size, self.grid_size))
-                self.draw_grid_lines()  # Draw grid lines
-
-    def draw_start_end_nodes(self):
-        # draws start/end nodes
-        if self.grid.start_node_pos:
-            row, column = self.grid.start_node_pos
-            pygame.draw.rect(self.window, START_COLOUR, (column * self.grid_size, row * self.grid_size, self.grid_size, self.grid_size))
-
-        if self.grid.end_node_pos:
-            row, column = self.grid.end_node_pos
-            pygame.draw.rect(self.window, END_COLOUR, (column * self.grid_size, row * self.grid_size, self.grid_size, self.grid_size))
-
-        self.draw_grid_lines() 
-
-    # tkinter window acting as a help/ information window guide
+    # tkinter window acting as a help/ information window guide. it's built once, then hidden rather than
+    # destroyed when closed, so clicking "?" again just shows it
     def info_button(self):
-        root = tk.Tk()
-        root.title("Information")
-        root.geometry("720x800")
+        root = get_tk_root()
+        if self.help_window is None:
+            self.help_window = self.build_help_window(root)
+        self.help_window.deiconify()
+        self.help_window.lift()
+        root.mainloop() # returns when the help window is closed
+
+    def build_help_window(self, root):
+        import tkinter as tk
+        from tkinter import ttk
+        window = tk.Toplevel(root)
+        window.title("Information")
+        window.geometry("720x800")
+
+        def close():
+            window.withdraw()
+            root.quit()
+        window.protocol("WM_DELETE_WINDOW", close)
         
-        tabControl = ttk.Notebook(root)
+        tabControl = ttk.Notebook(window)
         tab1 = ttk.Frame(tabControl)
         tab2 = ttk.Frame(tabControl)
         tab3 = ttk.Frame(tabControl)
@@ -272,7 +490,7 @@ class Interface:
         ttk.Label(tab1, text="   Place end node", font="Calibri 11").grid(row=2, column=1, padx=1, pady=1)
 
         ttk.Label(tab1, text="Scroll wheel click", font="Calibri 16 bold").grid(row=3, column=0, padx=10, pady=1)
-        ttk.Label(tab1, text="   Place wall node", font="Calibri 11").grid(row=3, column=1, padx=1, pady=1)
+        ttk.Label(tab1, text="   Place wall node (hold 1, 2 or 3 to paint weighted terrain instead)", font="Calibri 11").grid(row=3, column=1, padx=1, pady=1)
 
         ttk.Label(tab1, text="Button interaction", font="Calibri 20 bold italic").grid(row=4, column=0, padx=10, pady=1)
 
@@ -283,23 +501,44 @@ class Interface:
         ttk.Label(tab1, text="    Gives all empty nodes a certain probablity of becoming a wall node", font="Calibri 11").grid(row=6, column=1, padx=1, pady=1)
 
         ttk.Label(tab1, text="Generate maze", font="Calibri 16 bold").grid(row=7, column=0, padx=10, pady=1)
-        ttk.Label(tab1, text="    Generates a random maze", font="Calibri 11").grid(row=7, column=1, padx=1, pady=1)
+        ttk.Label(tab1, text="    Generates a random maze (right click to change the algorithm)", font="Calibri 11").grid(row=7, column=1, padx=1, pady=1)
 
         ttk.Label(tab1, text="BFS", font="Calibri 16 bold").grid(row=8, column=0, padx=10, pady=1)
         ttk.Label(tab1, text="    Perform a Breadth-First-Search on grid", font="Calibri 11").grid(row=8, column=1, padx=1, pady=1)
 
         ttk.Label(tab1, text="Dijkstra", font="Calibri 16 bold").grid(row=9, column=0, padx=10, pady=1)
-        ttk.Label(tab1, text="    Perform Dijkstra's Algorithm on grid", font="Calibri 11").grid(row=9, column=1, padx=1, pady=1)
+        ttk.Label(tab1, text="    Perform Dijkstra's Algorithm on grid (press B to search from both ends)", font="Calibri 11").grid(row=9, column=1, padx=1, pady=1)
+
+        ttk.Label(tab1, text="A* / JPS", font="Calibri 16 bold").grid(row=12, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    Perform an A* search (right click A* to change heuristic) or a Jump Point Search on grid", font="Calibri 11").grid(row=12, column=1, padx=1, pady=1)
 
         ttk.Label(tab1, text="Solve", font="Calibri 16 bold").grid(row=10, column=0, padx=10, pady=1)
         ttk.Label(tab1, text="    Initiates a timer, user can attempt to solve the grid by using the arrow keys", font="Calibri 11").grid(row=10, column=1, padx=1, pady=1)
 
+        ttk.Label(tab1, text="Zoom and pan", font="Calibri 16 bold").grid(row=14, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    Mouse wheel zooms, W A S D pans, F fits the whole grid on screen", font="Calibri 11").grid(row=14, column=1, padx=1, pady=1)
+
+        ttk.Label(tab1, text="Live replan", font="Calibri 16 bold").grid(row=15, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    Walls drawn after a search repair the path straight away, L turns this on and off", font="Calibri 11").grid(row=15, column=1, padx=1, pady=1)
+
+        ttk.Label(tab1, text="Profiling", font="Calibri 16 bold").grid(row=16, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    P shows frame and search timings, E saves them to profile.json", font="Calibri 11").grid(row=16, column=1, padx=1, pady=1)
+
+        ttk.Label(tab1, text="Cancel", font="Calibri 16 bold").grid(row=17, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    Escape stops a search or maze that's still running, as do Reset and editing the grid", font="Calibri 11").grid(row=17, column=1, padx=1, pady=1)
+
+        ttk.Label(tab1, text="Search playback", font="Calibri 16 bold").grid(row=13, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    Space pauses, , and . step, [ and ] skip, - and = change speed, Enter finishes", font="Calibri 11").grid(row=13, column=1, padx=1, pady=1)
+
+        ttk.Label(tab1, text="Weights", font="Calibri 16 bold").grid(row=11, column=0, padx=10, pady=1)
+        ttk.Label(tab1, text="    Scatters weighted terrain over empty nodes, darker terrain costs more to cross", font="Calibri 11").grid(row=11, column=1, padx=1, pady=1)
+
         ''' https://www.geeksforgeeks.org/python-add-image-on-a-tkinter-button/ '''
 
-        bfs_photo = PhotoImage(file = r"C:\Users\Liam\Desktop\nea_code\BFS_image.png") 
+        bfs_photo = tk.PhotoImage(master=window, file=os.path.join(ASSET_DIR, "BFS_image.png"))
         bfs_title = ttk.Label(tab2, text = "Breadth-First Search", font="Calibri 11 bold")
         bfs_title.grid(row=0, column=0, sticky="w", padx=10, pady=10)
-        bfs_image = Label(tab2, image=bfs_photo)
+        bfs_image = ttk.Label(tab2, image=bfs_photo)
         bfs_image.grid(row=1, column=0, sticky="nw", padx=10, pady=10)
         bfs_text = ttk.Label(tab2, text="""The Breadth-First Search algorithm works by starting at the root of the graph, 
         visitng all nodes on the current depth level, before moving to the next depth level.""", font="Calibri 12")
@@ -322,10 +561,10 @@ class Interface:
         ttk.Label(tab2, text="Q.enqueue( w )", font="Calibri 8").grid(row=15, column=0, sticky="w", padx=10, pady=(5, 0))
         ttk.Label(tab2, text="mark w as visited", font="Calibri 8").grid(row=16, column=0, sticky="w", padx=10, pady=(5, 0))
        
-        dijkstra_photo = PhotoImage(file = r"C:\Users\Liam\Desktop\nea_code\dijkstra_image.png") 
+        dijkstra_photo = tk.PhotoImage(master=window, file=os.path.join(ASSET_DIR, "dijkstra_image.png"))
         dijkstra_title = ttk.Label(tab3, text = "Dijktra's algorithm", font="Calibri 11 bold")
         dijkstra_title.grid(row=0, column=0, sticky="w", padx=10, pady=10)
-        dijkstra_image = Label(tab3, image=dijkstra_photo)
+        dijkstra_image = ttk.Label(tab3, image=dijkstra_photo)
         dijkstra_image.grid(row=1, column=0, sticky="nw", padx=10, pady=10)
         dijkstra_text = ttk.Label(tab3, text="""Dijkstra's algorithm finds the shortest path from the start node to all other nodes in a graph by using the 
      weights of edges to find a path that minimises the total distance between start node and all other nodes.""", font="Calibri 12")
@@ -353,148 +592,37 @@ class Interface:
         ttk.Label(tab3, text="", font="Calibri 8").grid(row=19, column=0, sticky="w", padx=10, pady=(5, 0))
         ttk.Label(tab3, text="  return dist[], prev[]", font="Calibri 8").grid(row=20, column=0, sticky="w", padx=10, pady=(5, 0))
 
-        root.mainloop() 
+        self.help_images = [bfs_photo, dijkstra_photo]
+        return window
 
-class Pathfinding:
-    def __init__(self):
-        self.path = None
-
-    def bfs(self, grid, start, end, window, animation_delay=5):
-        queue = [start] # queue initialised 
-        visited = [] # list to track visited nodes
-        came_from = {} # dictionary to store parent nodes, used to reconstruct path
-
-        while queue:
-            current_node = queue.pop(0)
-
-            # if current node is end node, reconstruct path and return
-            if current_node == end:
-                grid.reset_explored_nodes()
-                return self.reconstruct_path(start, end, came_from)
-
-            # explore neighbours of current node
-            for neighbour in grid.get_neighbours(current_node):
-                if neighbour not in visited: # add neighbour to queue and mark visited
-                    queue.append(neighbour)
-                    visited.append(neighbour)
-                    came_from[neighbour] = current_node # parent node stored to reconrcut path
-                    if neighbour != start and neighbour != end:
-                        grid.grid[neighbour[0]][neighbour[1]] = 3
-                    pygame.time.delay(animation_delay)
-                    window.fill(WHITE)
-                    interface.draw_grid()
-                    pygame.display.flip()
-
-        return None
-
-    # boilerplate code to reconstruct path from end node to start node
-    def reconstruct_path(self, start, end, came_from):
-        path = [end]
-        current_node = end
-
-        while current_node != start:
-            current_node = came_from[current_node]
-            path.append(current_node)
-
-        return path[::-1]  # reverses path to get it from start to end
-
-    def dijkstra(self, grid, start, end, window, animation_delay=5):
-        self.dists = {}
-        self.prev_nodes = {}
-
-        # nested loops to popilated dictionaries
-        for row in range(grid.rows):
-            for column in range(grid.columns):
-                self.dists[(row, column)] = float('inf')
-                self.prev_nodes[(row, column)] = None
-
-        self.dists[start] = 0
-
-        # 2d array to keep track of visited nodes
-        visited = [[0] * grid.columns for _ in range(grid.rows)]
-        while True:
-            # gets  node with  smallest distance among unvisited nodes
-            min_dist_node = None
-            min_dist = float('inf')
-            for node, dist in self.dists.items():
-                row, column = node
-                if visited[row][column] == 0 and dist < min_dist:
-                    min_dist = dist
-                    min_dist_node = node
-
-            if min_dist_node is None:
-                # all reachable nodes have been visited
-                break
-
-            row, column = min_dist_node
-            visited[row][column] = 1  # node has been visited
-
-            if min_dist_node == end:
-                grid.reset_explored_nodes()
-                return self.reconstruct_path(start, end, self.prev_nodes)
-
-            for neighbour in grid.get_neighbours(min_dist_node):
-                # calculate  distance to neighbour thru current node
-                dist = self.dists[min_dist_node] + 1 
-
-                if dist < self.dists[neighbour]:
-                    self.dists[neighbour] = dist
-                    self.prev_nodes[neighbour] = min_dist_node
-                    if neighbour != start and neighbour != end:
-                        grid.grid[neighbour[0]][neighbour[1]] = 3
-                    pygame.time.delay(animation_delay)
-                    window.fill(WHITE)
-                    interface.draw_grid()
-                    pygame.display.flip()
-
-class MazeGenerator:
-    def initiate_maze(self, grid):
-        # set all cells to walls
-        for row in range(grid.rows):
-            for column in range(grid.columns):
-                grid.grid[row][column] = -1
-
-        #print(grid.grid)
-        
-        #  recursive backtracking to generate maze
-        def generate_maze(row, column):
-            grid.grid[row][column] = 0  # mark the current cell as empty
-            
-            directions = [(0, 2), (2, 0), (0, -2), (-2, 0)] 
-            random.shuffle(directions)
-            
-            # explore each direction from current cell
-            for change_in_row, change_in_column in directions:
-                n_row, n_column = row + change_in_row, column + change_in_column
-                #hecks if new position is within grid bounds and unvisited
-                if (0 <= n_row < grid.rows) and (0 <= n_column < grid.columns) and (grid.grid[n_row][n_column] == -1):
-                    # carve passage between current cell and unvisited neighbour
-                    wall_row = (row + n_row) // 2
-                    wall_column = (column + n_column) // 2
-                    grid.grid[wall_row][wall_column] = 0 
-                    # recursion
-                    generate_maze(n_row, n_column)
-        # maze generation always starts from top left corner
-        generate_maze(0, 0)
-          
 class MazeSolver:
     def __init__(self, start_node_pos):
         self.start_time = None
-        self.font = pygame.font.Font(None, 36)
         self.timer_rect = pygame.Rect(550, 100, 150, 50)
+        self.timer_label = TextLabel(pygame.font.Font(None, 36), self.timer_rect.topleft)
+        self.distance_label = TextLabel(pygame.font.Font(None, 24), (550, 130))
+        self.distance_remaining = None # hint shown while the user moves their node, from the grid's cached distance field
         self.timer_running = False
         self.node_pos = start_node_pos
+        self.under_node = None # what the cell the node is on held before it got there, put back when it moves off
         self.initial_node_pos_set = False
         self.elapsed_time = 0 
         self.should_draw_timer = False
+        self.moves = deque() # queued (change in row, change in column) moves, made on the next update
+        self.held_key = None # arrow key being held down, if any
+        self.repeat_timer = 0 # seconds until the held key moves the node again
 
     def reset(self):
         self.start_time = None
         self.timer_running = False
         self.node_pos = None
+        self.under_node = None
         self.initial_node_pos_set = False
         self.elapsed_time = 0
         self.should_draw_timer = False
+        self.distance_remaining = None
+        self.moves.clear()
+        self.held_key = None
 
     def start_timer(self):
         self.start_time = time.time()  
@@ -512,59 +640,83 @@ class MazeSolver:
         else:
             return self.elapsed_time  
 
-    def draw_timer(self, window):
+    def draw_timer(self, window, force=False):
+        # returns the areas of the window that changed, the text is only re-rendered when the time shown changes
+        timer_text = ""
         if self.should_draw_timer:
             elapsed_time = self.get_elapsed_time()
-            timer_text = self.font.render("Time: {:.2f}".format(elapsed_time), True, BLACK)
-            window.blit(timer_text, (self.timer_rect.x, self.timer_rect.y))
-
-    def user_movement(self, grid, window):
-        # Handle user-controlled movement using arrow key
+            timer_text = "Time: {:.2f}".format(elapsed_time)
+        distance_text = ""
+        if self.should_draw_timer and self.distance_remaining is not None:
+            distance_text = "Distance to end: " + str(self.distance_remaining)
+        return self.timer_label.draw(window, timer_text, force) + self.distance_label.draw(window, distance_text, force)
+
+    # arrow key presses are queued as moves while the timer runs, rather than polling the keyboard each frame
+    def handle_key(self, event):
+        if event.type == pygame.KEYDOWN and event.key in MOVE_KEYS and self.timer_running:
+            self.moves.append(MOVE_KEYS[event.key])
+            self.held_key = event.key
+            self.repeat_timer = MOVE_REPEAT_DELAY
+        elif event.type == pygame.KEYUP and event.key == self.held_key:
+            self.held_key = None
+
+    def user_movement(self, grid, dt):
+        # Handle user-controlled movement using arrow key, run every fixed update step of dt seconds
         if not self.initial_node_pos_set:
             self.node_pos = grid.start_node_pos
+            self.under_node = grid.grid[self.node_pos[0]][self.node_pos[1]]
             self.initial_node_pos_set = True
 
-        keys = pygame.key.get_pressed()
-        dx = 0
-        dy = 0
-        if keys[pygame.K_LEFT]:
-            dx = -1
-        elif keys[pygame.K_RIGHT]:
-            dx = 1
-        elif keys[pygame.K_UP]:
-            dy = -1
-        elif keys[pygame.K_DOWN]:
-            dy = 1
-
-        new_x = self.node_pos[1] + dx
-        new_y = self.node_pos[0] + dy
-
-        if 0 <= new_x < grid.columns and 0 <= new_y < grid.rows and grid.grid[new_y][new_x] != -1:
-            # move node to the new position
-            grid.grid[self.node_pos[0]][self.node_pos[1]] = 0
-            self.node_pos = (new_y, new_x)
-            grid.grid[new_y][new_x] = 5  # 5 on grid represesnts user controlled node
-            pygame.time.delay(100)  # delay so node is easier to control for user
-            window.fill(WHITE)
-            interface.draw_grid()
-            pygame.display.flip()
+        # holding a key repeats its move on a timer, instead of sleeping between moves
+        if self.held_key is not None:
+            self.repeat_timer -= dt
+            while self.repeat_timer <= 0:
+                self.moves.append(MOVE_KEYS[self.held_key])
+                self.repeat_timer += MOVE_REPEAT_INTERVAL
+
+        # queued moves stop once the end is reached
+        while self.moves and self.node_pos != grid.end_node_pos:
+            dy, dx = self.moves.popleft()
+            new_x = self.node_pos[1] + dx
+            new_y = self.node_pos[0] + dy
+
+            if 0 <= new_x < grid.columns and 0 <= new_y < grid.rows and grid.grid[new_y][new_x] != -1:
+                # move node to the new position, putting back whatever it was covering (terrain, the start node).
+                # the node is only drawn over cells, so moving it isn't an edit and grid.version stays the same
+                grid.grid[self.node_pos[0]][self.node_pos[1]] = self.under_node
+                self.node_pos = (new_y, new_x)
+                self.under_node = grid.grid[new_y][new_x]
+                grid.grid[new_y][new_x] = 5  # 5 on grid represesnts user controlled node
+
+        # distance left to the end, a lookup in the cached distance field once it has been built
+        if grid.end_node_pos:
+            self.distance_remaining = grid.distance_field(grid.end_node_pos).distance(self.node_pos)
 
         # checks if user controlled node is at end node, if so end timer
         if self.node_pos == grid.end_node_pos:
             self.stop_timer()
+            self.moves.clear()
+            self.held_key = None
 
 
-# setting position of pygame window - https://stackoverflow.com/questions/4135928/pygame-display-position
-x = 80
-y = 250
-os.environ['SDL_VIDEO_WINDOW_POS'] = "%d,%d" % (x,y)
-
-# initialise objects
-grid = Grid(GRID_ROWS, GRID_COLUMNS, GRID_SIZE)
-interface = Interface(grid, MAX_GRID_WIDTH, MAX_GRID_HEIGHT)
+# initialise objects - the window and the objects that draw to it are made by setup(), so importing this
+# module doesn't open a window
 pathfinding = Pathfinding()
 maze_generator = MazeGenerator()
-maze_solver = MazeSolver(grid.start_node_pos)
+grid = None
+interface = None
+maze_solver = None
+
+def setup():
+    global grid, interface, maze_solver
+    # setting position of pygame window - https://stackoverflow.com/questions/4135928/pygame-display-position
+    x = 80
+    y = 250
+    os.environ.setdefault('SDL_VIDEO_WINDOW_POS', "%d,%d" % (x,y))
+
+    grid = Grid(GRID_ROWS, GRID_COLUMNS, GRID_SIZE)
+    interface = Interface(grid, MAX_GRID_WIDTH, MAX_GRID_HEIGHT)
+    maze_solver = MazeSolver(grid.start_node_pos)
 
 
 '''
@@ -624,32 +776,40 @@ print("placing_wall initialised successfully")
 path = None
 
 def Main():
+    if interface is None:
+        setup()
+    clock = pygame.time.Clock()
+    dt = 0 # seconds taken by the last frame
+    lag = 0 # seconds of game time not yet updated
+    profiler = interface.profiler
     while True:
+        profiler.start_frame()
         for event in pygame.event.get():
             #print(grid.grid)
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                interface.full_redraw = True
 
             interface.handle_button_clicks(event)
+            interface.handle_key_presses(event)
+            interface.handle_view_events(event)
+            maze_solver.handle_key(event)
+        interface.handle_worker_messages()
+        profiler.mark("events")
         interface.handle_mouse_events()
-        if maze_solver.timer_running:
-                maze_solver.user_movement(grid, interface.window)
-        interface.window.fill(WHITE)
-        interface.draw_grid()
-        interface.draw_buttons(interface.reset_button_rect, 
-                       interface.bfs_button_rect, 
-                       interface.randomise_button_rect, 
-                       interface.info_button_rect, 
-                       interface.dijkstra_button_rect,
-                       interface.generate_maze_button_rect, 
-                       interface.solve_button_rect, 
-                       pygame.font.Font(None, 36))
-        interface.draw_grid_lines()
-        maze_solver.draw_timer(interface.window)
-        interface.draw_path(path)
-        interface.draw_start_end_nodes()
-        interface.draw_grid_lines()
+        profiler.mark("mouse")
+
+        # the game moves on in fixed steps of TIMESTEP however long frames take, so movement and playback
+        # run at the same speed at any frame rate
+        lag = min(lag + dt, MAX_FRAME_TIME)
+        while lag >= TIMESTEP:
+            if maze_solver.timer_running:
+                maze_solver.user_movement(grid, TIMESTEP)
+            interface.update_playback(TIMESTEP)
+            lag -= TIMESTEP
+        profiler.mark("update")
 
         #print( grid.grid)
         #grid.get_neighbours((1,1))
@@ -674,7 +834,11 @@ def Main():
             print("Timer is reset")
             '''
 
-        pygame.display.flip()
+        # only the parts of the window that changed are sent to the display
+        pygame.display.update(interface.draw_frame(path))
+        profiler.mark("flip")
+        profiler.end_frame(animating=bool(interface.playback) and not interface.playback.finished())
+        dt = clock.tick(FPS) / 1000
 
 if __name__ == "__main__":
     Main()
\ No newline at end of file
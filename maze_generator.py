@@ -0,0 +1,208 @@
+from array import array
+import random
+from grid import check_seed
+
+# maze algorithms that can be picked by name in MazeGenerator.initiate_maze
+GENERATORS = ("backtracker", "kruskal", "prim", "wilson", "eller")
+
+# mazes are carved on the cells with even row and column, the odd cells between them are the walls
+# that get knocked down, so moving between maze cells is a step of 2
+DIRECTIONS = [(0, 2), (2, 0), (0, -2), (-2, 0)]
+
+class MazeGenerator:
+    # seed makes the maze reproducible, when it is None the shared random module is used
+    def initiate_maze(self, grid, algorithm="backtracker", seed=None):
+        if algorithm not in GENERATORS:
+            raise ValueError("unknown maze algorithm: " + str(algorithm))
+        check_seed(seed)
+        rng = random if seed is None else random.Random(seed)
+        # set all cells to walls
+        grid.fill(-1)
+        getattr(self, algorithm)(grid, rng)
+        grid.seed = seed # saved with the maze so it can be generated again
+        grid.edited()
+
+    # maze cells next to index (two cells away, inside the grid), as (neighbour, wall between them)
+    def maze_neighbours(self, grid, index):
+        row, column = divmod(index, grid.columns)
+        neighbours = []
+        for change_in_row, change_in_column in DIRECTIONS:
+            n_row, n_column = row + change_in_row, column + change_in_column
+            if 0 <= n_row < grid.rows and 0 <= n_column < grid.columns:
+                neighbour = n_row * grid.columns + n_column
+                neighbours.append((neighbour, (index + neighbour) // 2))
+        return neighbours
+
+    # recursive backtracking with an explicit stack, so it isn't limited by python's recursion depth
+    def backtracker(self, grid, rng):
+        cells = grid.cells
+        # maze generation always starts from top left corner
+        cells[0] = 0
+        stack = array('i', [0])
+
+        while stack:
+            # unvisited maze cells are still walls (255)
+            unvisited = [(neighbour, wall) for neighbour, wall in self.maze_neighbours(grid, stack[-1]) if cells[neighbour] == 255]
+            if not unvisited:
+                stack.pop() # dead end, backtrack
+                continue
+            # carve passage between current cell and a random unvisited neighbour
+            neighbour, wall = rng.choice(unvisited)
+            cells[wall] = cells[neighbour] = 0
+            stack.append(neighbour)
+
+    # randomised kruskal - knocks down walls in a random order, skipping any that would join
+    # two cells already connected, which is tracked with a union-find over the maze cells
+    def kruskal(self, grid, rng):
+        cells = grid.cells
+        columns = grid.columns
+        parents = array('i', range(len(cells)))
+        # every wall between two maze cells, walls on odd rows join cells above and below
+        walls = array('i')
+        for row in range(0, grid.rows, 2):
+            for column in range(0, columns, 2):
+                index = row * columns + column
+                cells[index] = 0
+                if column + 2 < columns:
+                    walls.append(index + 1)
+                if row + 2 < grid.rows:
+                    walls.append(index + columns)
+        rng.shuffle(walls)
+
+        def find(index):
+            # path halving - points each visited cell at its grandparent on the way up
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        for wall in walls:
+            if (wall // columns) % 2:
+                first, second = wall - columns, wall + columns
+            else:
+                first, second = wall - 1, wall + 1
+            first_root, second_root = find(first), find(second)
+            if first_root != second_root:
+                parents[first_root] = second_root
+                cells[wall] = 0
+
+    # randomised prim - grows the maze from one cell, each step joining a random frontier cell
+    # (a maze cell next to the maze but not in it yet) to a random neighbour already in the maze
+    def prim(self, grid, rng):
+        cells = grid.cells
+        in_frontier = bytearray(len(cells))
+        frontier = array('i')
+
+        def add_cell(index):
+            cells[index] = 0
+            for neighbour, wall in self.maze_neighbours(grid, index):
+                if cells[neighbour] == 255 and not in_frontier[neighbour]:
+                    in_frontier[neighbour] = 1
+                    frontier.append(neighbour)
+
+        add_cell(0)
+        while frontier:
+            # swap a random frontier cell to the end so it can be popped cheaply
+            position = rng.randrange(len(frontier))
+            frontier[position], frontier[-1] = frontier[-1], frontier[position]
+            current = frontier.pop()
+            neighbour, wall = rng.choice([(neighbour, wall) for neighbour, wall in self.maze_neighbours(grid, current) if cells[neighbour] == 0])
+            cells[wall] = 0
+            add_cell(current)
+
+    # wilson's algorithm - loop-erased random walks from each cell until they hit the maze,
+    # which gives every possible maze the same chance of being generated
+    def wilson(self, grid, rng):
+        cells = grid.cells
+        columns = grid.columns
+        # direction last taken out of each cell on the current walk, overwriting it erases loops
+        next_cell = array('i', [-1]) * len(cells)
+        cells[0] = 0
+
+        for row in range(0, grid.rows, 2):
+            for column in range(0, columns, 2):
+                start = row * columns + column
+                # random walk until the walk reaches a cell already in the maze
+                current = start
+                while cells[current] == 255:
+                    neighbour, wall = rng.choice(self.maze_neighbours(grid, current))
+                    next_cell[current] = neighbour
+                    current = neighbour
+                # carve the loop-erased walk into the maze
+                current = start
+                while cells[current] == 255:
+                    cells[current] = cells[(current + next_cell[current]) // 2] = 0
+                    current = next_cell[current]
+
+    # eller's algorithm, filling the grid from the row stream below
+    def eller(self, grid, rng):
+        for row, cells in enumerate(self.generate_eller_rows(grid.rows, grid.columns, rng)):
+            grid.cells[row * grid.columns:(row + 1) * grid.columns] = cells.tobytes()
+
+    # streams a maze one grid row at a time using eller's algorithm, each row is an array of
+    # -1 (wall) and 0 (empty) like the grid. only the current row's sets are kept, so memory is
+    # O(columns) however many rows are generated, e.g.
+    #     for row in maze_generator.eller_rows(1000000, 101, seed=1): ...
+    def eller_rows(self, rows, columns, seed=None):
+        return self.generate_eller_rows(rows, columns, random if seed is None else random.Random(seed))
+
+    def generate_eller_rows(self, rows, columns, rng):
+        width = (columns + 1) // 2 # maze cells per row, on the even columns
+        sets = [None] * width # set of every maze cell in the current row
+        members = {} # set -> maze cells in the current row that belong to it
+        next_set = 0
+
+        for row in range(0, rows, 2):
+            # cells that weren't joined from the row above start in a set of their own
+            for position in range(width):
+                if sets[position] is None:
+                    sets[position] = next_set
+                    members[next_set] = [position]
+                    next_set += 1
+
+            last_row = row + 2 >= rows
+            cells = array('b', [-1]) * columns
+            cells[0] = 0
+            # randomly join neighbouring cells in different sets, the last row joins all of them
+            for position in range(1, width):
+                cells[position * 2] = 0
+                left, right = sets[position - 1], sets[position]
+                if left != right and (last_row or rng.random() < 0.5):
+                    cells[position * 2 - 1] = 0
+                    # merge the smaller set into the larger one
+                    if len(members[left]) < len(members[right]):
+                        left, right = right, left
+                    for member in members[right]:
+                        sets[member] = left
+                    members[left].extend(members.pop(right))
+            yield cells
+
+            if last_row:
+                # an even number of rows leaves a final row of wall, as with the other generators
+                if row + 1 < rows:
+                    yield array('b', [-1]) * columns
+                return
+
+            # every set carries on down through at least one cell, so no part of the maze is cut off
+            below = array('b', [-1]) * columns
+            next_sets = [None] * width
+            next_members = {}
+            for set_id, positions in members.items():
+                going_down = [position for position in positions if rng.random() < 0.5]
+                if not going_down:
+                    going_down = [rng.choice(positions)]
+                for position in going_down:
+                    below[position * 2] = 0
+                    next_sets[position] = set_id
+                next_members[set_id] = going_down
+            yield below
+            sets, members = next_sets, next_members
+
+# writes a stream of rows (e.g. from eller_rows) to a binary file, one byte per cell in the same
+# layout as Grid.cells, so a maze that fits in memory can be read straight back into a grid
+def write_rows(rows, file):
+    count = 0
+    for row in rows:
+        file.write(row.tobytes())
+        count += 1
+    return count
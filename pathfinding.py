@@ -0,0 +1,637 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+import heapq
+import math
+import time
+
+import wavefront
+
+UNREACHED = 2 ** 62 # distance of a cell that hasn't been reached yet
+
+# heuristics for astar, each estimates the cost from (row, column) to (end_row, end_column).
+# moves are 4-directional and cost at least 1, so all of these are admissible
+def manhattan(row, column, end_row, end_column):
+    return abs(row - end_row) + abs(column - end_column)
+
+def euclidean(row, column, end_row, end_column):
+    return math.hypot(row - end_row, column - end_column)
+
+def octile(row, column, end_row, end_column):
+    change_in_row, change_in_column = abs(row - end_row), abs(column - end_column)
+    return max(change_in_row, change_in_column) + (math.sqrt(2) - 1) * min(change_in_row, change_in_column)
+
+def zero(row, column, end_row, end_column):
+    return 0 # turns astar into dijkstra
+
+HEURISTICS = {"manhattan": manhattan, "euclidean": euclidean, "octile": octile, "zero": zero}
+
+# solvers that can be run by name through Pathfinding.solve
+SOLVERS = ("bfs", "dijkstra", "astar", "jps", "bidirectional_bfs", "bidirectional_dijkstra")
+if wavefront.numpy is not None:
+    SOLVERS += ("wavefront_bfs",)
+
+class Pathfinding:
+    def __init__(self):
+        self.path = None
+        self.nodes_expanded = 0
+        self.search_time = 0
+        self.trace = None # SearchTrace being recorded by the current search, if any
+        self.stats = None # SearchStats being counted for the current search, if any
+
+    # headless entry point - runs a solver by name and records its wall-clock time in self.search_time,
+    # options are passed through, e.g. solve("astar", grid, start, end, heuristic="octile").
+    # passing a SearchTrace records every frontier/expanded cell so the search can be animated afterwards.
+    # check_reachable looks up whether end can be reached from start in the grid's connected regions first and
+    # skips the search if it can't. labelling the regions costs about as much as one search, so it pays off
+    # when a grid is searched more than once between edits.
+    # passing a SearchStats (instrumentation.py) counts relaxations and the peak frontier size as well, and times
+    # on_explore separately as drawing time. without one the searches only pay for a None check
+    def solve(self, algorithm, grid, start, end, on_explore=None, trace=None, check_reachable=False, stats=None, **options):
+        if algorithm not in SOLVERS:
+            raise ValueError("unknown algorithm: " + str(algorithm))
+        self.trace = trace
+        self.stats = stats
+        if stats is not None and on_explore:
+            on_explore = self.timed(on_explore, stats)
+        start_time = time.perf_counter()
+        if check_reachable and not grid.is_reachable(start, end):
+            self.trace = self.stats = None
+            self.path = None
+            self.nodes_expanded = 0
+            self.search_time = time.perf_counter() - start_time
+            return None
+        try:
+            path = getattr(self, algorithm)(grid, start, end, on_explore, **options)
+        finally:
+            self.trace = self.stats = None
+        self.search_time = time.perf_counter() - start_time
+        if stats is not None:
+            stats.nodes_expanded = self.nodes_expanded
+            stats.search_time = self.search_time - stats.draw_time
+        return path
+
+    # wraps an on_explore callback so the time spent in it is counted as drawing rather than searching
+    def timed(self, on_explore, stats):
+        def timed_on_explore(node):
+            start_time = time.perf_counter()
+            on_explore(node)
+            stats.draw_time += time.perf_counter() - start_time
+        return timed_on_explore
+
+    # shortest path from the grid's cached distance field to end, the first query to an end builds the field
+    # (one full search), later ones are a walk along it until the grid is edited. nodes_expanded is 0 on a cache hit
+    def cached_path(self, grid, start, end):
+        start_time = time.perf_counter()
+        misses = grid.distance_fields.misses
+        field = grid.distance_field(end)
+        self.nodes_expanded = field.nodes_expanded if grid.distance_fields.misses != misses else 0
+        path = field.path_from(start)
+        self.search_time = time.perf_counter() - start_time
+        return path
+
+    # on_explore is an optional callback run each time a node is marked as explored,
+    # the visualiser uses it to animate the search, headless callers leave it as None
+    def bfs(self, grid, start, end, on_explore=None):
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        # parent index of every cell, -1 means not visited yet, so this doubles as the visited set
+        parents = grid.cell_array('i', -1)
+        parents[start_index] = start_index
+        queue = deque([start_index]) # queue initialised 
+        self.nodes_expanded = 0
+
+        while queue:
+            current = queue.popleft()
+            self.mark_expanded(current)
+
+            # if current node is end node, reconstruct path and return
+            if current == end_index:
+                grid.reset_explored_nodes()
+                return self.reconstruct_path_from_parents(grid, start_index, end_index, parents)
+
+            # explore neighbours of current node
+            for neighbour in grid.get_neighbour_indices(current):
+                if parents[neighbour] == -1:
+                    queue.append(neighbour)
+                    parents[neighbour] = current # parent node stored to reconstruct path
+                    self.mark_explored(grid, neighbour, on_explore)
+
+        return None
+
+    # boilerplate code to reconstruct path from end node to start node
+    def reconstruct_path(self, start, end, came_from):
+        path = [end]
+        current_node = end
+
+        while current_node != start:
+            current_node = came_from[current_node]
+            path.append(current_node)
+
+        return path[::-1]  # reverses path to get it from start to end
+
+    # same as reconstruct_path, but walks a flat array of parent indices instead of a dictionary
+    def reconstruct_path_from_parents(self, grid, start_index, end_index, parents):
+        path = [grid.to_node(end_index)]
+        current = end_index
+
+        while current != start_index:
+            current = parents[current]
+            path.append(grid.to_node(current))
+
+        return path[::-1]
+
+    # marks a cell as explored (3) for the visualiser, weighted terrain and start/end nodes are left alone
+    def mark_explored(self, grid, index, on_explore):
+        if grid.cells[index] == 0:
+            grid.cells[index] = 3
+        if self.trace is not None:
+            self.trace.frontier(index)
+        if self.stats is not None:
+            self.stats.relaxed()
+        if on_explore:
+            on_explore(grid.to_node(index))
+
+    # counts a node being taken off the frontier
+    def mark_expanded(self, index):
+        self.nodes_expanded += 1
+        if self.trace is not None:
+            self.trace.expanded(index)
+        if self.stats is not None:
+            self.stats.expanded(self.nodes_expanded)
+
+    # queue_type picks the priority queue - "heap" (binary heap, any weights) or
+    # "bucket" (Dial's algorithm, a ring of buckets, best when move costs are small integers)
+    def dijkstra(self, grid, start, end, on_explore=None, queue_type="heap"):
+        cells = grid.cells
+        move_costs = grid.move_costs
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        self.dists = grid.cell_array('q', UNREACHED) # distance from start, indexed by cell
+        self.prev_nodes = grid.cell_array('i', -1) # parent index of every cell
+        self.dists[start_index] = 0
+        self.prev_nodes[start_index] = start_index
+        settled = grid.cell_array('B') # 1 once a cell's shortest distance is final
+        self.nodes_expanded = 0
+
+        if queue_type == "heap":
+            queue = HeapQueue()
+        elif queue_type == "bucket":
+            queue = BucketQueue(max(move_costs))
+        else:
+            raise ValueError("unknown queue type: " + str(queue_type))
+        queue.push(0, start_index)
+
+        while queue:
+            # gets node with smallest distance among unvisited nodes, stale queue entries are skipped
+            dist, current = queue.pop()
+            if settled[current]:
+                continue
+            settled[current] = 1
+            self.mark_expanded(current)
+
+            if current == end_index:
+                grid.reset_explored_nodes()
+                return self.reconstruct_path_from_parents(grid, start_index, end_index, self.prev_nodes)
+
+            for neighbour in grid.get_neighbour_indices(current):
+                # calculate distance to neighbour thru current node, using the cost of the cell being entered
+                new_dist = dist + move_costs[cells[neighbour]]
+
+                if new_dist < self.dists[neighbour]:
+                    self.dists[neighbour] = new_dist
+                    self.prev_nodes[neighbour] = current
+                    queue.push(new_dist, neighbour)
+                    self.mark_explored(grid, neighbour, on_explore)
+
+        # all reachable nodes have been visited
+        return None
+
+    # one search from start for many targets - dijkstra (on a bucket queue) that stops as soon as every target
+    # is settled, instead of a search per target. targets=None settles every reachable cell, giving the whole
+    # shortest path tree. the ShortestPathTree returned answers distance/path queries for any settled cell
+    def shortest_path_tree(self, grid, start, targets=None, on_explore=None):
+        cells = grid.cells
+        move_costs = grid.move_costs
+        start_index = grid.to_index(start)
+        remaining = None if targets is None else {grid.to_index(target) for target in targets}
+        dists = grid.cell_array('q', UNREACHED)
+        parents = grid.cell_array('i', -1)
+        settled = grid.cell_array('B')
+        dists[start_index] = 0
+        parents[start_index] = start_index
+        self.nodes_expanded = 0
+        queue = BucketQueue(max(move_costs))
+        queue.push(0, start_index)
+
+        while queue and remaining != set():
+            dist, current = queue.pop()
+            if settled[current]:
+                continue
+            settled[current] = 1
+            self.mark_expanded(current)
+            if remaining is not None:
+                remaining.discard(current)
+
+            for neighbour in grid.get_neighbour_indices(current):
+                new_dist = dist + move_costs[cells[neighbour]]
+                if new_dist < dists[neighbour]:
+                    dists[neighbour] = new_dist
+                    parents[neighbour] = current
+                    queue.push(new_dist, neighbour)
+                    self.mark_explored(grid, neighbour, on_explore)
+
+        grid.reset_explored_nodes()
+        return ShortestPathTree(grid, start_index, dists, parents, settled)
+
+    # shortest path from start to each target, {target: path or None if it can't be reached}, from a single search
+    def multi_target(self, grid, start, targets, on_explore=None):
+        targets = list(targets)
+        tree = self.shortest_path_tree(grid, start, targets, on_explore)
+        return {target: tree.path_to(target) for target in targets}
+
+    def astar(self, grid, start, end, on_explore=None, heuristic="manhattan"):
+        estimate = HEURISTICS[heuristic]
+        cells = grid.cells
+        move_costs = grid.move_costs
+        columns = grid.columns
+        end_row, end_column = end
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        self.dists = grid.cell_array('q', UNREACHED) # cost from start, indexed by cell
+        self.prev_nodes = grid.cell_array('i', -1)
+        self.dists[start_index] = 0
+        self.prev_nodes[start_index] = start_index
+        settled = grid.cell_array('B')
+        self.nodes_expanded = 0
+        # queue entries are (cost so far + estimate, estimate, cell), so ties go to the node nearest the end
+        start_estimate = estimate(start[0], start[1], end_row, end_column)
+        queue = [(start_estimate, start_estimate, start_index)]
+
+        while queue:
+            current = heapq.heappop(queue)[2]
+            if settled[current]:
+                continue
+            settled[current] = 1
+            self.mark_expanded(current)
+
+            if current == end_index:
+                grid.reset_explored_nodes()
+                return self.reconstruct_path_from_parents(grid, start_index, end_index, self.prev_nodes)
+
+            for neighbour in grid.get_neighbour_indices(current):
+                new_dist = self.dists[current] + move_costs[cells[neighbour]]
+
+                if new_dist < self.dists[neighbour]:
+                    self.dists[neighbour] = new_dist
+                    self.prev_nodes[neighbour] = current
+                    row, column = divmod(neighbour, columns)
+                    remaining = estimate(row, column, end_row, end_column)
+                    heapq.heappush(queue, (new_dist + remaining, remaining, neighbour))
+                    self.mark_explored(grid, neighbour, on_explore)
+
+        return None
+
+
+    # bfs a whole layer at a time with numpy (see wavefront.py), for unweighted grids too big to search a cell at
+    # a time. paths are the same length as bfs's. the search itself doesn't stop for each cell, so the animation,
+    # trace and stats are played back from its layers afterwards, and only when something is asking for them
+    def wavefront_bfs(self, grid, start, end, on_explore=None):
+        search = wavefront.Wavefront(grid)
+        playback = on_explore or self.trace is not None or self.stats is not None
+        search.expand(search.to_padded(start), stop_at=search.to_padded(end), keep_layers=playback)
+        self.nodes_expanded = 0
+        if not playback:
+            self.nodes_expanded = search.cells_reached()
+            return search.path_to(end)
+        for depth, layer in enumerate(search.layers):
+            layer = [grid.to_index(search.to_node(index)) for index in layer.tolist()]
+            if depth:
+                for index in layer:
+                    self.mark_explored(grid, index, on_explore)
+            for index in layer:
+                self.mark_expanded(index)
+        path = search.path_to(end)
+        if path:
+            grid.reset_explored_nodes()
+        return path
+
+    # bfs run from both ends at once, expanding whichever frontier is smaller one whole layer at a time.
+    # the layer that first touches the other search holds the shortest path, so once it is finished
+    # the shortest of the joins found in it is returned
+    def bidirectional_bfs(self, grid, start, end, on_explore=None):
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        self.nodes_expanded = 0
+        if start_index == end_index:
+            return [end]
+        # index 0 is the search from the start, index 1 the search from the end
+        dists = [grid.cell_array('i', -1), grid.cell_array('i', -1)]
+        parents = [grid.cell_array('i', -1), grid.cell_array('i', -1)]
+        dists[0][start_index] = dists[1][end_index] = 0
+        parents[0][start_index], parents[1][end_index] = start_index, end_index
+        frontiers = [[start_index], [end_index]]
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other = 1 - side
+            best = None # (length, node on this side, node on the other side)
+            next_frontier = []
+
+            for current in frontiers[side]:
+                self.mark_expanded(current)
+                for neighbour in grid.get_neighbour_indices(current):
+                    if dists[other][neighbour] != -1:
+                        length = dists[side][current] + 1 + dists[other][neighbour]
+                        if best is None or length < best[0]:
+                            best = (length, current, neighbour)
+                    if dists[side][neighbour] == -1:
+                        dists[side][neighbour] = dists[side][current] + 1
+                        parents[side][neighbour] = current
+                        next_frontier.append(neighbour)
+                        self.mark_explored(grid, neighbour, on_explore)
+
+            if best:
+                grid.reset_explored_nodes()
+                if side == 0:
+                    return self.join_paths(grid, start_index, end_index, parents, best[1], best[2])
+                return self.join_paths(grid, start_index, end_index, parents, best[2], best[1])
+            frontiers[side] = next_frontier
+
+        return None
+
+    # dijkstra run from both ends, always popping from whichever queue has the smaller distance.
+    # best is the cheapest start -> end route seen so far through a cell reached by both searches,
+    # and it can't be beaten once the two queue minimums add up to at least best
+    def bidirectional_dijkstra(self, grid, start, end, on_explore=None):
+        cells = grid.cells
+        move_costs = grid.move_costs
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        self.nodes_expanded = 0
+        if start_index == end_index:
+            return [end]
+        # forward distances include the cost of entering a cell, backward distances are the cost
+        # of the rest of the route after a cell, so the two add up at the cell where they meet
+        dists = [grid.cell_array('q', UNREACHED), grid.cell_array('q', UNREACHED)]
+        parents = [grid.cell_array('i', -1), grid.cell_array('i', -1)]
+        settled = [grid.cell_array('B'), grid.cell_array('B')]
+        dists[0][start_index] = dists[1][end_index] = 0
+        parents[0][start_index], parents[1][end_index] = start_index, end_index
+        queues = [[(0, start_index)], [(0, end_index)]]
+        best, meeting = UNREACHED, None
+
+        while queues[0] and queues[1] and queues[0][0][0] + queues[1][0][0] < best:
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            other = 1 - side
+            dist, current = heapq.heappop(queues[side])
+            if settled[side][current]:
+                continue
+            settled[side][current] = 1
+            self.mark_expanded(current)
+
+            for neighbour in grid.get_neighbour_indices(current):
+                # forwards a move costs the cell being entered, backwards it costs the cell being left
+                new_dist = dist + (move_costs[cells[neighbour]] if side == 0 else move_costs[cells[current]])
+                if new_dist < dists[side][neighbour]:
+                    dists[side][neighbour] = new_dist
+                    parents[side][neighbour] = current
+                    heapq.heappush(queues[side], (new_dist, neighbour))
+                    self.mark_explored(grid, neighbour, on_explore)
+                if dists[other][neighbour] != UNREACHED and dists[side][neighbour] + dists[other][neighbour] < best:
+                    best = dists[side][neighbour] + dists[other][neighbour]
+                    meeting = neighbour
+
+        if meeting is None:
+            return None
+        grid.reset_explored_nodes()
+        return self.join_paths(grid, start_index, end_index, parents, meeting, meeting)
+
+    # joins the start side's path to forward_node with the end side's path from backward_node,
+    # giving the same start to end list of (row, column) as reconstruct_path
+    def join_paths(self, grid, start_index, end_index, parents, forward_node, backward_node):
+        path = self.reconstruct_path_from_parents(grid, start_index, forward_node, parents[0])
+        backward_path = self.reconstruct_path_from_parents(grid, end_index, backward_node, parents[1])[::-1]
+        if forward_node == backward_node:
+            backward_path = backward_path[1:]
+        return path + backward_path
+
+    # jump point search for grids where every move costs the same - like bfs it ignores terrain weights.
+    # this is the 4-directional version: only jump points go on the open list, and the straight runs
+    # between them are scanned without being queued, which skips most of the symmetric paths on open grids
+    def jps(self, grid, start, end, on_explore=None):
+        start_index, end_index = grid.to_index(start), grid.to_index(end)
+        end_row, end_column = end
+        dists = {start_index: 0} # only jump points are stored, so dictionaries stay small
+        parents = {start_index: start_index}
+        closed = set()
+        queue = [(0, 0, start_index)]
+        rows = JumpRows(grid, end)
+        self.nodes_expanded = 0
+
+        while queue:
+            current = heapq.heappop(queue)[2]
+            if current in closed:
+                continue
+            closed.add(current)
+            self.mark_expanded(current)
+
+            if current == end_index:
+                grid.reset_explored_nodes()
+                return self.reconstruct_jump_path(grid, start_index, end_index, parents)
+
+            row, column = grid.to_node(current)
+            for change_in_row, change_in_column in self.jump_directions(grid, current, parents[current]):
+                if change_in_row:
+                    jump_point = self.jump(grid, rows, row, column, change_in_row, end)
+                else:
+                    jump_point = rows.jump(row, column, change_in_column)
+                if jump_point is None:
+                    continue
+                jump_row, jump_column = jump_point
+                jump_index = grid.to_index(jump_point)
+                new_dist = dists[current] + abs(jump_row - row) + abs(jump_column - column)
+
+                if new_dist < dists.get(jump_index, UNREACHED):
+                    dists[jump_index] = new_dist
+                    parents[jump_index] = current
+                    remaining = manhattan(jump_row, jump_column, end_row, end_column)
+                    heapq.heappush(queue, (new_dist + remaining, remaining, jump_index))
+                    self.mark_explored(grid, jump_index, on_explore)
+
+        return None
+
+    # directions worth jumping in from a node, given the jump point it was reached from
+    def jump_directions(self, grid, current, parent):
+        if current == parent:
+            return [(-1, 0), (1, 0), (0, -1), (0, 1)] # start node, every direction
+        row, column = grid.to_node(current)
+        parent_row, parent_column = grid.to_node(parent)
+        if row == parent_row:
+            # travelling horizontally - carry on, or turn up/down
+            return [(-1, 0), (1, 0), (0, 1 if column > parent_column else -1)]
+        # travelling vertically - carry on, or turn left/right
+        return [(0, -1), (0, 1), (1 if row > parent_row else -1, 0)]
+
+    # steps from (row, column) up or down until it reaches a jump point (returned) or a wall (None).
+    # horizontal jumps are looked up in rows (a JumpRows) rather than stepped
+    def jump(self, grid, rows, row, column, change_in_row, end):
+        is_open = grid.is_open
+        while True:
+            row += change_in_row
+            if not is_open(row, column):
+                return None
+            if (row, column) == end:
+                return (row, column)
+            # forced neighbour - a cell left/right that is only reachable through here
+            if (is_open(row, column - 1) and not is_open(row - change_in_row, column - 1)) or \
+               (is_open(row, column + 1) and not is_open(row - change_in_row, column + 1)):
+                return (row, column)
+            # moving vertically, a cell is also a jump point if a horizontal jump from it finds one
+            if rows.jump(row, column, -1) or rows.jump(row, column, 1):
+                return (row, column)
+            # rows before the next one with a wall in or next to it (or the end's row) can't stop the jump
+            row = rows.quiet_until(row, change_in_row)
+
+    # jump points are joined by straight lines, so the path is rebuilt by filling in the cells between them
+    def reconstruct_jump_path(self, grid, start_index, end_index, parents):
+        jump_points = [end_index]
+        while jump_points[-1] != start_index:
+            jump_points.append(parents[jump_points[-1]])
+        jump_points.reverse()
+
+        path = [grid.to_node(start_index)]
+        for jump_point in jump_points[1:]:
+            end_row, end_column = grid.to_node(jump_point)
+            row, column = path[-1]
+            while (row, column) != (end_row, end_column):
+                row += (end_row > row) - (end_row < row)
+                column += (end_column > column) - (end_column < column)
+                path.append((row, column))
+        return path
+
+# horizontal jumps for jump point search, looked up rather than stepped (like JPS+). a vertical jump tries a
+# horizontal jump both ways from every cell it passes, so stepping them would scan the whole area between the
+# start and end. instead the columns where a jump along a row has to stop are worked out the first time the row is
+# needed - its walls, the cells with a forced neighbour (an open cell above or below with a wall behind it) and
+# the end - and every jump along it after that is a binary search. vertical jumps skip straight over
+# rows with no walls in or next to them, as nothing there can stop them. rows are kept for one search
+class JumpRows:
+    def __init__(self, grid, end):
+        self.grid = grid
+        self.end_row, self.end_column = end
+        self.walls = {} # row -> grid.wall_runs(row)
+        self.rows = {} # row -> (wall run starts, wall run ends, stops moving right, stops moving left)
+        self.busy_rows = None # rows with a wall in or next to them and the end's row, in order, made when first needed
+
+    # the row a vertical jump can go on to from row without checking any rows in between, the one before the
+    # next busy row in the direction it's going (which may be off the edge of the grid)
+    def quiet_until(self, row, change_in_row):
+        if self.busy_rows is None:
+            busy = {self.end_row}
+            for wall_row in self.grid.wall_rows():
+                busy.update((wall_row - 1, wall_row, wall_row + 1))
+            self.busy_rows = sorted(busy)
+        if change_in_row > 0:
+            position = bisect_right(self.busy_rows, row)
+            return (self.busy_rows[position] if position < len(self.busy_rows) else self.grid.rows) - 1
+        position = bisect_left(self.busy_rows, row)
+        return (self.busy_rows[position - 1] if position else -1) + 1
+
+    def wall_runs(self, row):
+        runs = self.walls.get(row)
+        if runs is None:
+            runs = self.walls[row] = self.grid.wall_runs(row)
+        return runs
+
+    # works out where jumps along a row stop, the first time the row is needed
+    def row(self, row):
+        runs = self.wall_runs(row)
+        right, left = set(), set()
+        for neighbour in (row - 1, row + 1):
+            if 0 <= neighbour < self.grid.rows:
+                # moving right the cell after a wall above or below has a forced neighbour, moving left the one before
+                for start, end in self.wall_runs(neighbour):
+                    right.add(end)
+                    left.add(start - 1)
+        if row == self.end_row:
+            right.add(self.end_column)
+            left.add(self.end_column)
+        stops = self.rows[row] = ([start for start, end in runs], [end for start, end in runs], sorted(right), sorted(left))
+        return stops
+
+    # first jump point from (row, column) along the row, change_in_column is 1 or -1. None if a wall comes first
+    def jump(self, row, column, change_in_column):
+        stops = self.rows.get(row)
+        if stops is None:
+            stops = self.row(row)
+        starts, ends, right, left = stops
+        if change_in_column > 0:
+            position = bisect_right(starts, column)
+            wall = starts[position] if position < len(starts) else self.grid.columns
+            position = bisect_right(right, column)
+            if position < len(right) and right[position] < wall:
+                return (row, right[position])
+        else:
+            position = bisect_right(ends, column)
+            wall = ends[position - 1] - 1 if position else -1
+            position = bisect_left(left, column)
+            if position and left[position - 1] > wall:
+                return (row, left[position - 1])
+        return None
+
+# result of Pathfinding.shortest_path_tree, only cells the search settled are answered, others count as unreached
+class ShortestPathTree:
+    def __init__(self, grid, start_index, dists, parents, settled):
+        self.grid = grid
+        self.start_index = start_index
+        self.dists = dists
+        self.parents = parents
+        self.settled = settled
+
+    def reached(self, node):
+        return bool(self.settled[self.grid.to_index(node)])
+
+    # cost of the shortest path from the start to node, None if it wasn't reached
+    def distance(self, node):
+        return self.dists[self.grid.to_index(node)] if self.reached(node) else None
+
+    def path_to(self, node):
+        if not self.reached(node):
+            return None
+        path = [node]
+        current = self.grid.to_index(node)
+        while current != self.start_index:
+            current = self.parents[current]
+            path.append(self.grid.to_node(current))
+        return path[::-1]
+
+# binary heap priority queue, ties are broken by the lower cell index
+class HeapQueue:
+    def __init__(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, dist, index):
+        heapq.heappush(self.heap, (dist, index))
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+# Dial's algorithm - one bucket per distance, kept in a ring of max_cost + 1 buckets,
+# since every queued distance is within max_cost of the one currently being popped
+class BucketQueue:
+    def __init__(self, max_cost):
+        self.buckets = [[] for _ in range(max_cost + 1)]
+        self.size = 0
+        self.dist = 0 # distance of the bucket currently being emptied
+
+    def __len__(self):
+        return self.size
+
+    def push(self, dist, index):
+        self.buckets[dist % len(self.buckets)].append(index)
+        self.size += 1
+
+    def pop(self):
+        # advance round the ring to the next non-empty bucket
+        while not self.buckets[self.dist % len(self.buckets)]:
+            self.dist += 1
+        self.size -= 1
+        return self.dist, self.buckets[self.dist % len(self.buckets)].pop()
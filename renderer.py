@@ -0,0 +1,207 @@
+import pygame
+from settings import *
+
+PATH = 100 # drawn in place of cells on the current path, not a real cell type
+
+# colour for every cell byte value, walls (-1) are stored as 255
+CELL_COLOURS = {0: WHITE, 1: START_COLOUR, 2: END_COLOUR, 255: WALL_COLOUR, 3: PREV_EXPLORED_COLOUR,
+                4: CURRENT_EXPLORED_COLOUR, 5: USER_CONTROLLED_COLOUR, PATH: BLUE}
+CELL_COLOURS.update(WEIGHTED_NODE_COLOURS)
+COLOURS = [CELL_COLOURS.get(value, WHITE) for value in range(256)]
+
+# past this many changed cells it is cheaper to update the whole grid than each cell
+MAX_DIRTY_RECTS = 500
+MIN_LINE_CELL_SIZE = 4 # grid lines are only drawn when cells are at least this many pixels wide
+MAX_CELL_SIZE = 64
+
+# which part of the grid is on screen. zoomed in, each cell is cell_size pixels wide, zoomed out
+# below a pixel a cell, each pixel shows every stride-th cell, so a frame never covers more cells than pixels
+class Viewport:
+    def __init__(self, grid, width, height):
+        self.grid = grid
+        self.width = width
+        self.height = height
+        self.fit()
+        # shrink to the fitted grid, so small grids don't leave a margin
+        self.width = min(width, -(-grid.columns // self.stride) * self.cell_size)
+        self.height = min(height, -(-grid.rows // self.stride) * self.cell_size)
+
+    # zooms so the whole grid is on screen
+    def fit(self):
+        self.top = self.left = 0
+        self.cell_size = min(self.width // self.grid.columns, self.height // self.grid.rows, MAX_CELL_SIZE)
+        self.stride = 1
+        if self.cell_size < 1:
+            self.cell_size = 1
+            self.stride = self.max_stride()
+
+    def max_stride(self):
+        return max(-(-self.grid.columns // self.width), -(-self.grid.rows // self.height), 1)
+
+    # number of grid rows and columns the viewport covers
+    def visible_rows(self):
+        return max(0, min(self.grid.rows - self.top, -(-self.height // self.cell_size) * self.stride))
+
+    def visible_columns(self):
+        return max(0, min(self.grid.columns - self.left, -(-self.width // self.cell_size) * self.stride))
+
+    # grid cell under a point in the viewport, or None if the point is outside it or past the edge of the grid
+    def cell_at(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        row = self.top + y // self.cell_size * self.stride
+        column = self.left + x // self.cell_size * self.stride
+        if row < self.grid.rows and column < self.grid.columns:
+            return (row, column)
+        return None
+
+    # zooms in (steps > 0) or out, keeping the cell under anchor (a point in the viewport) where it is
+    def zoom(self, steps, anchor):
+        x, y = anchor
+        row, column = self.cell_at(x, y) or (self.top, self.left)
+        for _ in range(abs(steps)):
+            if steps > 0:
+                if self.stride > 1:
+                    self.stride //= 2
+                elif self.cell_size < MAX_CELL_SIZE:
+                    self.cell_size = min(self.cell_size * 2, MAX_CELL_SIZE)
+            else:
+                if self.cell_size > 1:
+                    self.cell_size //= 2
+                elif self.stride < self.max_stride():
+                    self.stride = min(self.stride * 2, self.max_stride())
+        self.top = row - y // self.cell_size * self.stride
+        self.left = column - x // self.cell_size * self.stride
+        self.clamp()
+
+    # moves the view by a number of screens, e.g. pan(0, 0.25) moves a quarter of a screen right
+    def pan(self, screens_down, screens_right):
+        self.top += int(screens_down * self.height // self.cell_size * self.stride)
+        self.left += int(screens_right * self.width // self.cell_size * self.stride)
+        self.clamp()
+
+    def clamp(self):
+        rows_shown = self.height // self.cell_size * self.stride
+        columns_shown = self.width // self.cell_size * self.stride
+        self.top = max(0, min(self.top, self.grid.rows - rows_shown))
+        self.left = max(0, min(self.left, self.grid.columns - columns_shown))
+
+    def key(self):
+        return (self.top, self.left, self.cell_size, self.stride)
+
+# draws the part of the grid inside a viewport onto an off-screen surface. the visible cells are turned into
+# an 8-bit image with the cell colours as its palette and scaled up in one go, so the cost of a frame depends
+# on the viewport's size in pixels, not the size of the grid. when the view hasn't moved only changed cells are repainted
+class GridRenderer:
+    def __init__(self, grid, viewport):
+        self.grid = grid
+        self.viewport = viewport
+        self.surface = pygame.Surface((viewport.width + 1, viewport.height + 1))
+        self.drawn = None # what every visible cell looked like when it was last painted, None forces a full repaint
+        self.drawn_view = None
+        self.overlay = None # (path, (start, end, view), [(position in state, value)]) for the path and start/end nodes
+
+    # what every visible cell should look like - the grid's cells with the path and start/end nodes drawn over them,
+    # returned with the number of columns in each row of the state
+    def current_state(self, path):
+        view = self.viewport
+        cells = self.grid.cells
+        columns = self.grid.columns
+        visible_rows, visible_columns = view.visible_rows(), view.visible_columns()
+        state = bytearray()
+        for row in range(view.top, view.top + visible_rows, view.stride):
+            start = row * columns + view.left
+            state += cells[start:start + visible_columns:view.stride]
+        state_columns = len(range(0, visible_columns, view.stride))
+
+        # the overlay is only worked out again when the path or the view changes, as paths can be very long
+        key = (self.grid.start_node_pos, self.grid.end_node_pos, view.key())
+        if self.overlay is None or self.overlay[0] is not path or self.overlay[1] != key:
+            overlay = []
+            def add(node, value):
+                row, column = node[0] - view.top, node[1] - view.left
+                if 0 <= row < visible_rows and 0 <= column < visible_columns:
+                    overlay.append((row // view.stride * state_columns + column // view.stride, value))
+            for node in (path or [])[1:-1]:
+                add(node, PATH)
+            if self.grid.start_node_pos:
+                add(self.grid.start_node_pos, 1)
+            if self.grid.end_node_pos:
+                add(self.grid.end_node_pos, 2)
+            self.overlay = (path, key, overlay)
+        for position, value in self.overlay[2]:
+            state[position] = value
+        return state, state_columns
+
+    def paint_cell(self, row, column, value):
+        # fills the cell and redraws its top and left grid lines, the bottom and right ones belong to its neighbours
+        size = self.viewport.cell_size
+        x, y = column * size, row * size
+        pygame.draw.rect(self.surface, COLOURS[value], (x, y, size, size))
+        if size >= MIN_LINE_CELL_SIZE:
+            pygame.draw.line(self.surface, BLACK, (x, y), (x + size, y))
+            pygame.draw.line(self.surface, BLACK, (x, y), (x, y + size))
+        return pygame.Rect(x, y, size + 1, size + 1)
+
+    def redraw(self, path=None):
+        state, state_columns = self.current_state(path)
+        state_rows = len(state) // state_columns if state_columns else 0
+        size = self.viewport.cell_size
+        self.surface.fill(WHITE)
+        if state:
+            image = pygame.image.frombuffer(bytes(state), (state_columns, state_rows), 'P')
+            image.set_palette(COLOURS)
+            self.surface.blit(pygame.transform.scale(image, (state_columns * size, state_rows * size)), (0, 0))
+            if size >= MIN_LINE_CELL_SIZE:
+                # draws horizontal + vertical grid lines
+                for i in range(state_rows + 1):
+                    pygame.draw.line(self.surface, BLACK, (0, i * size), (state_columns * size, i * size))
+                for j in range(state_columns + 1):
+                    pygame.draw.line(self.surface, BLACK, (j * size, 0), (j * size, state_rows * size))
+        self.drawn = state
+        self.drawn_view = self.viewport.key()
+        return [self.surface.get_rect()]
+
+    # repaints what changed since the last update and returns the areas of the surface that changed
+    def update(self, path=None):
+        if self.drawn is None or self.drawn_view != self.viewport.key():
+            return self.redraw(path)
+        state, state_columns = self.current_state(path)
+        if state == self.drawn:
+            return []
+
+        dirty = []
+        for row in range(len(state) // state_columns):
+            start = row * state_columns
+            # whole rows are compared first, so unchanged rows are skipped in one go
+            if state[start:start + state_columns] != self.drawn[start:start + state_columns]:
+                for column in range(state_columns):
+                    if state[start + column] != self.drawn[start + column]:
+                        dirty.append(self.paint_cell(row, column, state[start + column]))
+                if len(dirty) > MAX_DIRTY_RECTS:
+                    return self.redraw(path)
+        self.drawn = state
+        return dirty
+
+# a line of text that is only re-rendered when it changes
+class TextLabel:
+    def __init__(self, font, position):
+        self.font = font
+        self.position = position
+        self.text = None
+        self.rect = None
+
+    # draws text, returning the areas of the window that changed (none if the text is the same)
+    def draw(self, window, text, force=False):
+        if text == self.text and not force:
+            return []
+        dirty = []
+        if self.rect:
+            window.fill(WHITE, self.rect) # clear the old text
+            dirty.append(self.rect)
+        self.text = text
+        self.rect = None
+        if text:
+            self.rect = window.blit(self.font.render(text, True, BLACK), self.position)
+            dirty.append(self.rect)
+        return dirty
@@ -0,0 +1,80 @@
+from array import array
+
+# event kinds, stored in the bottom bit of each event
+FRONTIER = 0 # a cell was added to the search's frontier
+EXPANDED = 1 # a cell was taken off the frontier and its neighbours explored
+
+# compact record of everything a search did, in order, so it can be animated after the search has finished.
+# each event is one int, cell index * 2 + kind
+class SearchTrace:
+    def __init__(self):
+        self.events = array('q')
+
+    def __len__(self):
+        return len(self.events)
+
+    def frontier(self, index):
+        self.events.append(index * 2 + FRONTIER)
+
+    def expanded(self, index):
+        self.events.append(index * 2 + EXPANDED)
+
+    # cell indices in the order they were first reached
+    def visited(self):
+        return [event >> 1 for event in self.events if event & 1 == FRONTIER]
+
+# animates a trace onto a grid - frontier cells are drawn as 4 and expanded cells as 3,
+# cells_per_frame events are applied every frame at fps frames a second
+class TracePlayback:
+    def __init__(self, grid, trace, path=None, cells_per_frame=20, fps=60):
+        self.grid = grid
+        self.trace = trace
+        self.path = path # result of the search, shown once playback finishes
+        self.cells_per_frame = cells_per_frame
+        self.fps = fps
+        self.position = 0 # number of events applied so far
+        self.paused = False
+        self.time_banked = 0 # seconds of playback not yet turned into whole frames
+        self.original = bytes(grid.cells) # cells before playback, used when scrubbing backwards
+
+    def finished(self):
+        return self.position == len(self.trace)
+
+    # moves playback on by dt seconds of real time
+    def update(self, dt):
+        if self.paused or self.finished():
+            return
+        self.time_banked += dt
+        frames = int(self.time_banked * self.fps)
+        self.time_banked -= frames / self.fps
+        self.seek(self.position + frames * self.cells_per_frame)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    # steps forwards (or backwards when count is negative) a number of events
+    def step(self, count=1):
+        self.seek(self.position + count)
+
+    def finish(self):
+        self.seek(len(self.trace))
+
+    # jumps to any point in the trace, applying or undoing events to get there
+    def seek(self, position):
+        position = max(0, min(position, len(self.trace)))
+        cells = self.grid.cells
+        events = self.trace.events
+        while self.position < position:
+            event = events[self.position]
+            index = event >> 1
+            # only empty or already explored cells are painted, so walls drawn during playback are kept
+            if cells[index] in (0, 3, 4):
+                cells[index] = 3 if event & 1 == EXPANDED else 4
+            self.position += 1
+        while self.position > position:
+            self.position -= 1
+            event = events[self.position]
+            index = event >> 1
+            if cells[index] in (0, 3, 4):
+                # undoing an expansion leaves the cell on the frontier, undoing a frontier event restores it
+                cells[index] = 4 if event & 1 == EXPANDED and self.original[index] == 0 else self.original[index]
@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+
+from pathfinding import Pathfinding
+from maze_generator import MazeGenerator
+from incremental_search import IncrementalPlanner
+
+# kinds of message a job sends back through SearchWorker.messages
+PROGRESS = "progress" # job.explored and job.frontier have been updated
+DONE = "done" # the job finished, its result is on the job
+CANCELLED = "cancelled" # the job stopped early after being cancelled
+FAILED = "failed" # the job raised an exception, kept in job.error
+
+# raised from a search's on_explore callback once its job has been cancelled, to unwind out of the solver
+class SearchCancelled(Exception):
+    pass
+
+# one search or maze generation. it works on a copy of the grid, so the grid on screen can be edited while it runs,
+# and version is the grid's version when the copy was taken - once the grid moves on the result is out of date
+class Job:
+    def __init__(self, number, kind, grid, algorithm, options, plan=False):
+        self.number = number
+        self.kind = kind # "search" or "maze"
+        self.grid = grid.copy()
+        self.version = grid.version
+        self.algorithm = algorithm
+        self.options = options
+        self.plan = plan # once a search finds a path, also plan it with an IncrementalPlanner for repairing after edits
+        self.planner = None
+        self.cancel_requested = threading.Event() # the cancellation token, checked by the job as it runs
+        self.explored = 0 # cells added to the frontier so far
+        self.frontier = 0 # cells on the frontier at the last progress report
+        self.path = None
+        self.nodes_expanded = 0
+        self.search_time = 0
+        self.error = None
+        self.thread = None # thread the job runs on
+
+    def cancel(self):
+        self.cancel_requested.set()
+
+    def cancelled(self):
+        return self.cancel_requested.is_set()
+
+# the on_explore callback of a search job, it counts explored cells, checks whether the job has been cancelled and
+# sends a progress message every interval seconds. it only looks at the token and the clock every 1024 cells
+class JobProgress:
+    def __init__(self, worker, job, pathfinding, interval):
+        self.worker = worker
+        self.job = job
+        self.pathfinding = pathfinding
+        self.interval = interval
+        self.last_report = time.perf_counter()
+
+    def __call__(self, node):
+        job = self.job
+        job.explored += 1
+        if job.explored & 1023 == 0:
+            if job.cancelled():
+                raise SearchCancelled()
+            if time.perf_counter() - self.last_report > self.interval:
+                self.last_report = time.perf_counter()
+                # every explored cell is put on the frontier once and taken off when it's expanded, the start aside
+                job.frontier = job.explored - self.pathfinding.nodes_expanded + 1
+                self.worker.messages.put((PROGRESS, job))
+
+# runs searches and maze generation on a background thread so the window keeps responding while they run. one job
+# runs at a time, starting another cancels the one before. messages about jobs are put on a queue, (kind, job),
+# which the main loop empties each frame with poll().
+#
+# searches are stopped part way through when cancelled. maze generation can't be interrupted, so a cancelled
+# maze finishes on its own copy of the grid and is thrown away. the searches are pure python, so they still share
+# the interpreter with the window (the GIL), which gets a turn every few milliseconds rather than none at all
+class SearchWorker:
+    def __init__(self, progress_interval=0.1):
+        self.progress_interval = progress_interval
+        self.messages = queue.Queue()
+        self.job = None # job started most recently
+        self.jobs_started = 0
+
+    def busy(self):
+        return self.job is not None and self.job.thread.is_alive()
+
+    # starts a search with Pathfinding.solve, options (including trace, stats and check_reachable) are passed through.
+    # plan makes the job's planner too, so the first edit after the search doesn't have to plan from scratch
+    def start_search(self, grid, algorithm, plan=False, **options):
+        return self.start("search", grid, algorithm, options, plan)
+
+    def start_maze(self, grid, algorithm, seed=None):
+        return self.start("maze", grid, algorithm, {"seed": seed})
+
+    def start(self, kind, grid, algorithm, options, plan=False):
+        self.cancel()
+        self.jobs_started += 1
+        job = self.job = Job(self.jobs_started, kind, grid, algorithm, options, plan)
+        job.thread = threading.Thread(target=self.run, args=(job,), daemon=True)
+        job.thread.start()
+        return job
+
+    # asks the current job to stop, its CANCELLED message arrives once it has
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def run(self, job):
+        try:
+            if job.kind == "search":
+                pathfinding = Pathfinding()
+                progress = JobProgress(self, job, pathfinding, self.progress_interval)
+                job.path = pathfinding.solve(job.algorithm, job.grid, job.grid.start_node_pos, job.grid.end_node_pos,
+                                             on_explore=progress, **job.options)
+                job.nodes_expanded = pathfinding.nodes_expanded
+                job.search_time = pathfinding.search_time
+                if job.plan and job.path is not None and not job.cancelled():
+                    job.planner = IncrementalPlanner(job.grid, job.grid.start_node_pos, job.grid.end_node_pos)
+                    job.planner.replan()
+            else:
+                MazeGenerator().initiate_maze(job.grid, job.algorithm, **job.options)
+        except SearchCancelled:
+            self.messages.put((CANCELLED, job))
+        except Exception as error:
+            job.error = error
+            self.messages.put((FAILED, job))
+        else:
+            self.messages.put((CANCELLED, job) if job.cancelled() else (DONE, job))
+
+    # messages sent since the last call, oldest first, without waiting for more
+    def poll(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
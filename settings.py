@@ -4,6 +4,22 @@ MAX_GRID_WIDTH = 500
 MAX_GRID_HEIGHT = 500
 GRID_ROWS, GRID_COLUMNS = 35, 35
 GRID_SIZE = min(MAX_GRID_WIDTH // GRID_COLUMNS, MAX_GRID_HEIGHT // GRID_ROWS)
+FPS = 60 # frame rate cap for the main loop
+TIMESTEP = 1 / 120 # seconds of game time per fixed update step (movement, timer, search playback)
+MAX_FRAME_TIME = 0.25 # longest frame the updates catch up on, so a stall isn't replayed in one burst
+
+# user movement settings - holding an arrow key moves once, waits MOVE_REPEAT_DELAY seconds,
+# then moves every MOVE_REPEAT_INTERVAL seconds until it's released
+MOVE_REPEAT_DELAY = 0.25
+MOVE_REPEAT_INTERVAL = 0.1
+
+# search animation settings
+PLAYBACK_CELLS_PER_FRAME = 8
+PLAYBACK_FPS = 60
+
+# weighted terrain settings - cell type: cost of moving into a cell of that type
+# (every other cell that isn't a wall costs 1)
+WEIGHTED_NODE_COSTS = {6: 2, 7: 4, 8: 8}
 
 # colour settings
 
@@ -17,3 +33,4 @@ CURRENT_EXPLORED_COLOUR = (128, 0, 128)
 PREV_EXPLORED_COLOUR = (200, 200, 0)
 NODE_COLOUR = (255,192,203)
 USER_CONTROLLED_COLOUR = (255, 105, 180)
+WEIGHTED_NODE_COLOURS = {6: (205, 170, 125), 7: (160, 110, 60), 8: (100, 60, 30)}
@@ -0,0 +1,94 @@
+from grid import as_bytes
+
+# numpy isn't needed for anything else, so the wavefront solver is only offered when it's installed
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# bfs that expands a whole layer of the frontier at once with numpy instead of a cell at a time. the grid is
+# padded with a border of walls and flattened, so the neighbours of every frontier cell are the frontier shifted
+# by -width, +width, -1 and +1, and the ones still open and unvisited become the next layer. like bfs it ignores
+# terrain weights. each layer costs time in proportion to its size, not the grid's, so a whole grid is O(cells)
+class Wavefront:
+    def __init__(self, grid):
+        if numpy is None:
+            raise ImportError("the wavefront solver needs numpy")
+        self.grid = grid
+        self.width = grid.columns + 2
+        cells = numpy.frombuffer(as_bytes(grid.cells), dtype=numpy.uint8).reshape(grid.rows, grid.columns)
+        # open cells that haven't been reached yet, the border and walls are never open
+        self.unvisited = numpy.zeros((grid.rows + 2, self.width), dtype=bool)
+        self.unvisited[1:-1, 1:-1] = cells != 255
+        self.unvisited = self.unvisited.ravel()
+        self.distances = numpy.full(self.unvisited.size, -1, dtype=numpy.int32) # -1 until a cell is reached
+        self.layers = [] # cells reached at each distance as padded indices, if expand was asked to keep them
+
+    # padded index <-> (row, column)
+    def to_padded(self, node):
+        return (node[0] + 1) * self.width + node[1] + 1
+
+    def to_node(self, index):
+        row, column = divmod(index, self.width)
+        return (row - 1, column - 1)
+
+    # searches outwards from source until stop_at (a padded index) is reached or every reachable cell has been.
+    # keep_layers holds on to every layer, so what the search did can be played back
+    def expand(self, source, stop_at=None, keep_layers=False):
+        offsets = numpy.array([-self.width, self.width, -1, 1])
+        distances, unvisited = self.distances, self.unvisited
+        slots = numpy.empty(unvisited.size, dtype=numpy.int64)
+        if not unvisited[source]:
+            return # source is a wall
+        unvisited[source] = False
+        distances[source] = 0
+        frontier = numpy.array([source])
+        distance = 0
+        while frontier.size:
+            if keep_layers:
+                self.layers.append(frontier)
+            if stop_at is not None and distances[stop_at] != -1:
+                break
+            distance += 1
+            # every neighbour of every frontier cell, then only the open, unvisited ones
+            neighbours = (frontier[:, None] + offsets).ravel()
+            neighbours = neighbours[unvisited[neighbours]]
+            # a cell next to two frontier cells is in there twice. each copy writes its position into slots and
+            # only one write sticks, so keeping the copies that find their own position there keeps one of each,
+            # without the sort numpy.unique would do
+            positions = numpy.arange(neighbours.size)
+            slots[neighbours] = positions
+            frontier = neighbours[slots[neighbours] == positions]
+            unvisited[frontier] = False
+            distances[frontier] = distance
+
+    # number of cells the search reached, the source included
+    def cells_reached(self):
+        return int(numpy.count_nonzero(self.distances != -1))
+
+    # distance to every cell as a rows x columns array, -1 where the cell can't be reached
+    def distance_map(self):
+        return self.distances.reshape(self.grid.rows + 2, self.width)[1:-1, 1:-1]
+
+    # shortest path from the source to end, found by stepping back from end to any neighbour one closer.
+    # None if end wasn't reached
+    def path_to(self, end):
+        current = self.to_padded(end)
+        if self.distances[current] == -1:
+            return None
+        distances = self.distances
+        path = [end]
+        while distances[current]:
+            # same neighbour order as get_neighbours: up, down, left, right
+            for neighbour in (current - self.width, current + self.width, current - 1, current + 1):
+                if distances[neighbour] == distances[current] - 1:
+                    current = neighbour
+                    break
+            path.append(self.to_node(current))
+        return path[::-1]
+
+# distance from source to every cell of the grid, rows x columns, -1 for cells that can't be reached
+def distance_map(grid, source):
+    wavefront = Wavefront(grid)
+    wavefront.expand(wavefront.to_padded(source))
+    return wavefront.distance_map()